@@ -1,6 +1,63 @@
 from django.contrib import admin
+from django.core.cache import cache
+from django.db.models import Count, Q
 
-from .models import Category, Comment, Location, Post
+from . import search
+from .models import Category, Comment, EmailOutbox, Location, Post
+from .paginators import FeedPaginator
+
+# Полнотекстовый поиск в админке ограничен самыми релевантными записями.
+ADMIN_SEARCH_LIMIT = 1000
+# Фильтры по автору и местоположению показывают столько самых частых
+# значений; список пересчитывается раз в ADMIN_FILTER_CACHE_TIMEOUT секунд.
+ADMIN_FILTER_LIMIT = 20
+ADMIN_FILTER_CACHE_TIMEOUT = 60 * 10
+
+
+class TopRelatedFieldListFilter(admin.RelatedFieldListFilter):
+    """Фильтр по связанному объекту только с самыми частыми значениями.
+
+    Список всех пользователей или местоположений не помещается в боковую
+    панель и загружается при каждом открытии списка.
+    """
+
+    def field_choices(self, field, request, model_admin):
+        key = (
+            f'blog:admin-filter:{model_admin.model._meta.label_lower}:'
+            f'{field.name}'
+        )
+        choices = cache.get(key)
+        if choices is None:
+            top = list(
+                model_admin.model._default_manager
+                .filter(**{f'{field.name}__isnull': False})
+                .values_list(field.name, flat=True)
+                .annotate(total=Count('pk'))
+                .order_by('-total')[:ADMIN_FILTER_LIMIT]
+            )
+            related = field.related_model._default_manager.in_bulk(top)
+            choices = [(pk, str(related[pk])) for pk in top if pk in related]
+            cache.set(key, choices, ADMIN_FILTER_CACHE_TIMEOUT)
+        if self.lookup_val and self.lookup_val not in {
+                str(pk) for pk, _ in choices}:
+            # Выбранное значение остаётся в списке, даже если оно не в топе.
+            selected = field.related_model._default_manager.filter(
+                pk=self.lookup_val
+            ).first()
+            if selected is not None:
+                choices = [*choices, (selected.pk, str(selected))]
+        return choices
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Список без точного COUNT(*) по всей таблице.
+
+    FeedPaginator считает записи не дальше FEED_COUNT_LIMIT, а общее
+    число записей без фильтров не выводится.
+    """
+
+    paginator = FeedPaginator
+    show_full_result_count = False
 
 
 class CategoryAdmin(admin.ModelAdmin):
@@ -19,7 +76,7 @@ class CategoryAdmin(admin.ModelAdmin):
     list_display_links = ('title',)
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdmin):
     list_display = (
         'text',
         'created_at',
@@ -30,12 +87,14 @@ class CommentAdmin(admin.ModelAdmin):
     list_editable = (
         'is_published',
     )
-    search_fields = ('text', 'author')
-    list_filter = ('author', 'is_published')
+    list_select_related = ('author', 'post')
+    search_fields = ('text', 'author__username')
+    list_filter = (('author', TopRelatedFieldListFilter), 'is_published')
     list_display_links = ('text',)
+    autocomplete_fields = ('author', 'post')
 
 
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(LargeTableAdmin):
     list_display = (
         'title',
         'short_text',
@@ -49,9 +108,17 @@ class PostAdmin(admin.ModelAdmin):
     list_editable = (
         'is_published',
     )
-    search_fields = ('title', 'author', 'category')
-    list_filter = ('is_published', 'category', 'location', 'pub_date')
+    list_select_related = ('author', 'category', 'location')
+    search_fields = ('title', 'author__username', 'category__title')
+    list_filter = (
+        'is_published',
+        'category',
+        ('location', TopRelatedFieldListFilter),
+        ('author', TopRelatedFieldListFilter),
+        'pub_date',
+    )
     list_display_links = ('title',)
+    autocomplete_fields = ('author', 'category', 'location')
 
     def short_text(self, obj):
         max_length = 100
@@ -61,6 +128,20 @@ class PostAdmin(admin.ModelAdmin):
 
     short_text.short_description = 'Текст'
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term or not search.is_supported():
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        found = search.find_posts(
+            search_term, ADMIN_SEARCH_LIMIT, visible_only=False
+        )
+        # Имя автора в полнотекстовый индекс не входит.
+        return queryset.filter(
+            Q(pk__in=[pk for pk, _ in found])
+            | Q(author__username__icontains=search_term)
+        ), False
+
 
 class LocationAdmin(admin.ModelAdmin):
     list_display = (
@@ -76,7 +157,20 @@ class LocationAdmin(admin.ModelAdmin):
     list_display_links = ('name',)
 
 
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = (
+        'subject',
+        'created_at',
+        'sent_at',
+        'attempts',
+        'next_attempt_at',
+    )
+    list_filter = ('sent_at',)
+    readonly_fields = ('created_at', 'sent_at', 'attempts', 'last_error')
+
+
 admin.site.register(Category, CategoryAdmin)
 admin.site.register(Location, LocationAdmin)
 admin.site.register(Post, PostAdmin)
 admin.site.register(Comment, CommentAdmin)
+admin.site.register(EmailOutbox, EmailOutboxAdmin)
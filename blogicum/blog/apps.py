@@ -5,3 +5,9 @@ class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
     verbose_name = 'Блог'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .checks import warn_if_process_local_cache
+
+        warn_if_process_local_cache()
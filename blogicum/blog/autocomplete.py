@@ -0,0 +1,157 @@
+import bisect
+import threading
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from .cache import bump_generations, get_generation
+from .models import Category, Location
+
+User = get_user_model()
+
+
+def normalize(text):
+    return ' '.join(text.casefold().replace('ё', 'е').split())
+
+
+class PrefixIndex:
+    """Отсортированный по нормализованным названиям список объектов.
+
+    Каждое слово названия даёт свой ключ, поэтому «Красная площадь»
+    находится и по «крас», и по «площ». Поиск по префиксу — bisect.
+    """
+
+    def __init__(self, rows=()):
+        self._keys = []
+        self._labels = {}
+        for pk, label in rows:
+            self._labels[pk] = label
+            self._keys.extend(self._keys_for(pk, label))
+        self._keys.sort()
+
+    @staticmethod
+    def _keys_for(pk, label):
+        words = normalize(label).split(' ')
+        return {(' '.join(words[i:]), pk) for i in range(len(words))}
+
+    def add(self, pk, label):
+        self.remove(pk)
+        self._labels[pk] = label
+        for key in self._keys_for(pk, label):
+            bisect.insort(self._keys, key)
+
+    def remove(self, pk):
+        label = self._labels.pop(pk, None)
+        if label is None:
+            return
+        for key in self._keys_for(pk, label):
+            position = bisect.bisect_left(self._keys, key)
+            del self._keys[position]
+
+    def search(self, prefix, limit):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        found = []
+        position = bisect.bisect_left(self._keys, (prefix,))
+        while position < len(self._keys) and len(found) < limit:
+            key, pk = self._keys[position]
+            if not key.startswith(prefix):
+                break
+            if pk not in found:
+                found.append(pk)
+            position += 1
+        return [(pk, self._labels[pk]) for pk in found]
+
+    def label(self, pk):
+        return self._labels.get(pk)
+
+
+class AutocompleteIndex:
+    """PrefixIndex в памяти процесса.
+
+    Сигналы меняют индекс своего процесса на месте и увеличивают поколение
+    в общем кэше; остальные процессы по новому поколению перечитывают
+    названия из базы, если кэш общий (проверка blog.W001).
+    """
+
+    def __init__(self, kind, model, label_field, **filters):
+        self.kind = kind
+        self.model = model
+        self.generation_name = f'autocomplete:{kind}'
+        self._queryset = model.objects.filter(**filters)
+        self._label_field = label_field
+        self._filters = filters
+        self._lock = threading.Lock()
+        self._generation = None
+        self._index = None
+
+    def _load(self):
+        generation = get_generation(self.generation_name)
+        if generation == self._generation:
+            return self._index
+        with self._lock:
+            if generation != self._generation:
+                self._index = PrefixIndex(
+                    self._queryset.values_list('pk', self._label_field)
+                    .iterator()
+                )
+                self._generation = generation
+        return self._index
+
+    def search(self, prefix, limit):
+        return self._load().search(prefix, limit)
+
+    def label(self, pk):
+        return self._load().label(pk)
+
+    def _changed(self, change):
+        generation = get_generation(self.generation_name)
+        with self._lock:
+            in_sync = (
+                self._index is not None and generation == self._generation
+            )
+            if in_sync:
+                change(self._index)
+        bump_generations(self.generation_name)
+        if in_sync:
+            # Свой индекс уже актуален: после коммита запоминается
+            # поколение, которое выставил повторный сброс.
+            transaction.on_commit(self._follow_generation)
+
+    def _follow_generation(self):
+        self._generation = get_generation(self.generation_name)
+
+    def includes(self, obj):
+        return all(
+            getattr(obj, name) == value
+            for name, value in self._filters.items()
+        )
+
+    def update(self, obj):
+        if not self.includes(obj):
+            self.remove(obj)
+            return
+        self._changed(
+            lambda index: index.add(obj.pk, getattr(obj, self._label_field))
+        )
+
+    def remove(self, obj):
+        self._changed(lambda index: index.remove(obj.pk))
+
+
+indexes = {
+    index.kind: index for index in (
+        # Подсказки предлагают только то, что можно выбрать в форме.
+        AutocompleteIndex('category', Category, 'title', is_published=True),
+        AutocompleteIndex('location', Location, 'name', is_published=True),
+        AutocompleteIndex('user', User, 'username', is_active=True),
+    )
+}
+
+
+def index_for(model):
+    for index in indexes.values():
+        if index.model is model:
+            return index
+    raise LookupError(model)
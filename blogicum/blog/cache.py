@@ -0,0 +1,96 @@
+import hashlib
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Category
+
+GENERATION_KEY = 'blog:generation:{}'
+PAGE_KEY = 'blog:page:{}:{}'
+
+
+def new_generation():
+    # Значение из часов не повторяет поколения, вытесненные из кэша.
+    return time.time_ns() // 1000
+
+
+def get_generations(*names):
+    keys = {GENERATION_KEY.format(name): name for name in names}
+    found = cache.get_many(keys)
+    generations = {}
+    for key, name in keys.items():
+        if key not in found:
+            cache.add(key, new_generation(), timeout=None)
+            found[key] = cache.get(key)
+        generations[name] = found[key]
+    return generations
+
+
+def get_generation(name):
+    return get_generations(name)[name]
+
+
+def _bump(names):
+    for name in names:
+        key = GENERATION_KEY.format(name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, new_generation(), timeout=None)
+
+
+def bump_generations(*names):
+    _bump(names)
+    # Повтор после коммита сбрасывает то, что другие процессы успели
+    # закэшировать по данным, которые были до фиксации транзакции.
+    transaction.on_commit(lambda: _bump(names))
+
+
+def page_cache_key(request, generation_names):
+    generations = get_generations(*generation_names)
+    stamp = '.'.join(str(generations[name]) for name in generation_names)
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return PAGE_KEY.format(stamp, path)
+
+
+class TaxonomyCache:
+    """Категории в памяти процесса для страниц категорий.
+
+    Таблица маленькая и редко меняется, поэтому загружается целиком.
+    Актуальность сверяется с поколением 'taxonomy' в общем кэше: его
+    увеличивают сигналы, и остальные процессы перечитывают данные. Для
+    этого кэш должен быть общим для процессов (проверка blog.W001).
+    Местоположений может быть много, и здесь они не хранятся: поля формы
+    ищут их через blog.autocomplete.
+    """
+
+    generation_name = 'taxonomy'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._generation = None
+        self._categories = None
+
+    def _load(self):
+        generation = get_generation(self.generation_name)
+        if generation == self._generation:
+            return self._categories
+        with self._lock:
+            if generation != self._generation:
+                self._categories = {
+                    category.slug: category
+                    for category in Category.objects.all()
+                }
+                self._generation = generation
+        return self._categories
+
+    def published_category(self, slug):
+        category = self._load().get(slug)
+        if category is not None and category.is_published:
+            return category
+        return None
+
+
+taxonomy = TaxonomyCache()
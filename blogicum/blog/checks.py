@@ -0,0 +1,34 @@
+import logging
+
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+logger = logging.getLogger(__name__)
+
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs=None, **kwargs):
+    """Поколения blog.cache не доходят до других процессов через кэш,
+    который у каждого процесса свой.
+    """
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if settings.DEBUG or backend not in PROCESS_LOCAL_BACKENDS:
+        return []
+    return [Warning(
+        f'Кэш {backend} не общий для рабочих процессов: изменения '
+        'категорий, местоположений и публикаций не сбросят кэш в других '
+        'процессах.',
+        hint='Задайте адрес memcached в BLOGICUM_CACHE_LOCATION.',
+        id='blog.W001',
+    )]
+
+
+def warn_if_process_local_cache():
+    # Сервер приложений не запускает системные проверки.
+    for message in check_shared_cache():
+        logger.warning('%s %s', message.msg, message.hint)
@@ -1,9 +1,68 @@
+import uuid
+
 from django import forms
+from django.urls import reverse
+from django.utils.html import format_html
 
+from .autocomplete import indexes
 from .models import Comment, Post
+from .uploads import completed_upload, staged_file
+
+
+class AutocompleteWidget(forms.HiddenInput):
+    """Скрытое поле с id объекта и текстовое поле для поиска по названию.
+
+    Варианты подгружаются из autocomplete/<kind>/, поэтому страница не
+    содержит список всех объектов.
+    """
+
+    # Поле выводится с подписью, как обычное.
+    is_hidden = False
+
+    class Media:
+        js = ('js/autocomplete.js',)
+
+    def __init__(self, kind, attrs=None):
+        super().__init__(attrs)
+        self.kind = kind
+
+    def label_for(self, value):
+        # Подпись выбранного значения берётся из индекса в памяти процесса.
+        try:
+            return indexes[self.kind].label(int(value)) or ''
+        except (TypeError, ValueError):
+            return ''
+
+    def render(self, name, value, attrs=None, renderer=None):
+        attrs = dict(attrs or {})
+        input_id = attrs.pop('id', None) or f'id_{name}'
+        css_class = attrs.pop('class', 'form-control')
+        hidden = super().render(
+            name, value, {**attrs, 'id': f'{input_id}_value'}, renderer
+        )
+        return format_html(
+            '{}<input type="text" id="{}" class="{}" value="{}" '
+            'autocomplete="off" data-autocomplete-url="{}" '
+            'data-autocomplete-target="{}_value">',
+            hidden,
+            input_id,
+            css_class,
+            self.label_for(value),
+            reverse('blog:autocomplete', args=(self.kind,)),
+            input_id,
+        )
 
 
 class PostForm(forms.ModelForm):
+    """Изображение приходит в самой форме или по upload_token —
+    ссылке на завершённую загрузку по частям (uploads/).
+    """
+
+    upload_token = forms.CharField(required=False, widget=forms.HiddenInput)
+
+    class Media:
+        js = ('js/upload.js',)
+
     class Meta:
         model = Post
         fields = (
@@ -20,8 +79,52 @@ class PostForm(forms.ModelForm):
                 format='%Y-%m-%dT%H:%M',
                 attrs={'type': 'datetime-local'}
             ),
+            'location': AutocompleteWidget('location'),
+            'category': AutocompleteWidget('category'),
         }
 
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user = user
+        self.upload = None
+        self.fields['image'].widget.attrs.update({
+            'accept': 'image/*',
+            'data-upload-url': reverse('blog:upload'),
+            'data-upload-token': self.add_prefix('upload_token'),
+        })
+
+    def clean_upload_token(self):
+        token = self.cleaned_data['upload_token']
+        if token:
+            try:
+                self.upload = completed_upload(self.user, uuid.UUID(token))
+            except ValueError:
+                pass
+            if self.upload is None:
+                raise forms.ValidationError(
+                    'Загрузка изображения не найдена или не завершена.'
+                )
+        return token
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if self.files.get(self.add_prefix('image')):
+            # Файл, отправленный с формой, важнее загруженного по частям.
+            self.upload = None
+        return cleaned_data
+
+    def save(self, commit=True):
+        if self.upload is None:
+            return super().save(commit)
+        image = staged_file(self.upload)
+        self.instance.image = image
+        if not commit:
+            return super().save(commit)
+        with image:
+            post = super().save(commit)
+        self.upload.discard()
+        return post
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,194 @@
+import posixpath
+from collections import namedtuple
+from io import BytesIO
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+RENDITIONS_DIR = 'renditions'
+SOURCE_DIR = 'post_images'
+RENDITION_QUALITY = 80
+# Входит в имя производного файла: при изменении RENDITIONS или render()
+# его увеличивают, и у всех производных появляются новые адреса, поэтому
+# старые можно кэшировать навсегда. Файлы прошлых версий удаляет gc_media.
+RENDITION_VERSION = 1
+IMAGE_MAX_SIDE = settings.IMAGE_MAX_SIDE
+IMAGE_QUALITY = settings.IMAGE_QUALITY
+# Результат обработки загрузки до этого размера держится в памяти.
+SPOOL_MAX_SIZE = 5 * 1024 * 1024
+
+Rendition = namedtuple('Rendition', ('width', 'height', 'crop'))
+# Карточка обрезается до фиксированного размера, детальная страница
+# вписывается в рамку с сохранением пропорций.
+RENDITIONS = {
+    'card': Rendition(640, 360, True),
+    'card2x': Rendition(1280, 720, True),
+    'detail': Rendition(1200, 1200, False),
+}
+FORMATS = {
+    'webp': ('WEBP', 'image/webp'),
+    'jpeg': ('JPEG', 'image/jpeg'),
+}
+
+
+def rendition_name(source_name, rendition, image_format):
+    return posixpath.join(
+        RENDITIONS_DIR,
+        f'v{RENDITION_VERSION}',
+        rendition,
+        f'{source_name}.{image_format}'
+    )
+
+
+def rendition_source(name):
+    """Имя оригинала для файла из RENDITIONS_DIR или None, если имя не
+    соответствует ни одному производному изображению.
+    """
+    parts = name.split('/', 3)
+    if (len(parts) < 4 or parts[0] != RENDITIONS_DIR
+            or parts[1] != f'v{RENDITION_VERSION}'):
+        return None
+    source_name, extension = posixpath.splitext(parts[3])
+    if parts[2] not in RENDITIONS or extension[1:] not in FORMATS:
+        return None
+    return source_name if is_source_name(source_name) else None
+
+
+def rendition_url(source_name, rendition, image_format):
+    """Адрес производного изображения.
+
+    Файл может ещё не существовать: тогда запрос попадает в
+    views.RenditionView, который создаёт его при первом обращении.
+    """
+    return default_storage.url(
+        rendition_name(source_name, rendition, image_format)
+    )
+
+
+def source_size(image):
+    # Post хранит размер в image_size, без чтения файла.
+    size = getattr(getattr(image, 'instance', None), 'image_size', None)
+    if size:
+        return tuple(size)
+    return image.width, image.height
+
+
+def rendition_size(image, rendition):
+    """Размер производного изображения или (None, None), если размер
+    оригинала прочитать не удалось.
+    """
+    spec = RENDITIONS[rendition]
+    if spec.crop:
+        return spec.width, spec.height
+    try:
+        width, height = source_size(image)
+    except (OSError, ValueError):
+        return None, None
+    scale = min(spec.width / width, spec.height / height, 1)
+    return round(width * scale), round(height * scale)
+
+
+def is_source_name(name):
+    parts = name.split('/')
+    return (
+        len(parts) > 1
+        and parts[0] == SOURCE_DIR
+        and not any(part in ('', '.', '..') for part in parts)
+    )
+
+
+def render(image, rendition, image_format):
+    spec = RENDITIONS[rendition]
+    if image.format == 'JPEG':
+        # JPEG декодируется сразу в уменьшенном масштабе; сторона не
+        # меньше нужной при любом повороте из EXIF.
+        side = max(spec.width, spec.height)
+        image.draft('RGB', (side, side))
+    image = ImageOps.exif_transpose(image)
+    if spec.crop:
+        image = ImageOps.fit(
+            image, (spec.width, spec.height), Image.Resampling.LANCZOS
+        )
+    else:
+        image.thumbnail((spec.width, spec.height), Image.Resampling.LANCZOS)
+    pil_format, _ = FORMATS[image_format]
+    if pil_format == 'JPEG' and image.mode != 'RGB':
+        # В JPEG нет прозрачности: фон становится белым.
+        background = Image.new('RGB', image.size, 'white')
+        image = image.convert('RGBA')
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA')
+    output = BytesIO()
+    image.save(output, pil_format, quality=RENDITION_QUALITY)
+    return output.getvalue()
+
+
+def generate_rendition(source_name, rendition, image_format,
+                       storage=default_storage):
+    """Создаёт производное изображение, если его ещё нет на диске."""
+    name = rendition_name(source_name, rendition, image_format)
+    if storage.exists(name):
+        return name
+    with storage.open(source_name) as source, Image.open(source) as image:
+        content = render(image, rendition, image_format)
+    saved = storage.save(name, ContentFile(content))
+    if saved != name:
+        # Параллельный запрос успел сохранить тот же файл.
+        storage.delete(saved)
+    return name
+
+
+def generate_renditions(source_name, storage=default_storage):
+    return [
+        generate_rendition(source_name, rendition, image_format, storage)
+        for rendition in RENDITIONS
+        for image_format in FORMATS
+    ]
+
+
+def normalize_upload(upload):
+    """Уменьшает загруженное изображение и убирает из него метаданные.
+
+    Возвращает (файл, ширина, высота). Оригинал читается из файла загрузки
+    (большие загрузки Django держит во временном файле на диске), JPEG
+    декодируется сразу в уменьшенном масштабе. Анимированные изображения
+    сохраняются как есть.
+    """
+    upload.seek(0)
+    with Image.open(upload) as image:
+        if getattr(image, 'is_animated', False):
+            upload.seek(0)
+            return upload, image.width, image.height
+        if image.format == 'JPEG':
+            image.draft('RGB', (IMAGE_MAX_SIDE, IMAGE_MAX_SIDE))
+        has_alpha = (
+            image.mode in ('RGBA', 'LA', 'PA')
+            or 'transparency' in image.info
+        )
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(
+            (IMAGE_MAX_SIDE, IMAGE_MAX_SIDE), Image.Resampling.LANCZOS
+        )
+    if has_alpha:
+        pil_format, extension = 'PNG', 'png'
+        image = image.convert('RGBA')
+        options = {'optimize': True}
+    else:
+        pil_format, extension = 'JPEG', 'jpg'
+        image = image.convert('RGB')
+        options = {
+            'quality': IMAGE_QUALITY,
+            'optimize': True,
+            'progressive': True,
+        }
+    # EXIF и другие метаданные не передаются в save() и не сохраняются.
+    output = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    image.save(output, pil_format, **options)
+    output.seek(0)
+    stem = posixpath.splitext(posixpath.basename(upload.name))[0]
+    return File(output, name=f'{stem}.{extension}'), image.width, image.height
@@ -0,0 +1,151 @@
+import os
+import shutil
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blog.images import RENDITIONS_DIR, SOURCE_DIR, rendition_source
+from blog.models import Post, StoredFile
+from blog.uploads import expired_uploads
+
+
+def scan(directory):
+    """Обходит каталог без рекурсии, не собирая список файлов в памяти."""
+    stack = [directory]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет из MEDIA_ROOT изображения, на которые не ссылается ни одна '
+        'публикация, их производные, брошенные временные файлы и '
+        'незавершённые загрузки по частям.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать, какие файлы будут удалены.'
+        )
+        parser.add_argument(
+            '--quarantine',
+            metavar='DIR',
+            help='Переносить файлы в этот каталог вместо удаления.'
+        )
+        parser.add_argument(
+            '--min-age',
+            type=float,
+            default=24 * 60,
+            help=(
+                'Не трогать файлы, изменённые за столько минут: загрузка '
+                'может быть ещё не сохранена в публикации.'
+            )
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Сколько файлов проверять одним запросом к базе.'
+        )
+
+    def handle(self, *args, dry_run=False, quarantine=None, min_age=None,
+               chunk_size=None, **options):
+        self.root = settings.MEDIA_ROOT
+        self.dry_run = dry_run
+        self.quarantine = quarantine
+        self.cutoff = time.time() - min_age * 60
+        self.verbosity = options['verbosity']
+        count = size = 0
+        for chunk in chunked(self.candidates(), chunk_size):
+            removed = []
+            for name, path, file_size in self.orphans(chunk):
+                if self.collect(name, path):
+                    removed.append(name)
+                    size += file_size
+            count += len(removed)
+            if not dry_run:
+                StoredFile.objects.filter(name__in=removed).delete()
+        action = 'Будет удалено' if dry_run else 'Удалено'
+        self.stdout.write(
+            f'{action} файлов: {count} ({size / 1024 / 1024:.1f} МБ)'
+        )
+        expired = 0
+        for upload in expired_uploads().iterator():
+            if not dry_run:
+                upload.discard()
+            expired += 1
+        if expired:
+            self.stdout.write(f'{action} брошенных загрузок: {expired}')
+
+    def candidates(self):
+        """(имя, путь, размер, имя оригинала) старых файлов медиакаталога.
+
+        Для временных файлов загрузок и файлов с непонятными именами имя
+        оригинала — None: они удаляются без проверки по базе.
+        """
+        for directory in (SOURCE_DIR, RENDITIONS_DIR):
+            for entry in scan(os.path.join(self.root, directory)):
+                stat_result = entry.stat(follow_symlinks=False)
+                if stat_result.st_mtime >= self.cutoff:
+                    continue
+                name = os.path.relpath(entry.path, self.root).replace(
+                    os.sep, '/'
+                )
+                if entry.name.startswith('.'):
+                    source_name = None
+                elif directory == SOURCE_DIR:
+                    source_name = name
+                else:
+                    source_name = rendition_source(name)
+                yield name, entry.path, stat_result.st_size, source_name
+
+    def orphans(self, chunk):
+        referenced = set(
+            Post.objects.filter(
+                image__in={source for *_, source in chunk if source}
+            ).order_by().values_list('image', flat=True)
+        )
+        return [
+            (name, path, size)
+            for name, path, size, source in chunk
+            if source not in referenced
+        ]
+
+    def collect(self, name, path):
+        if self.dry_run or self.verbosity > 1:
+            self.stdout.write(name)
+        if self.dry_run:
+            return True
+        try:
+            if os.stat(path).st_mtime >= self.cutoff:
+                # Файл переиспользовали после проверки по базе.
+                return False
+            if self.quarantine:
+                target = os.path.join(self.quarantine, name)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.move(path, target)
+            else:
+                os.remove(path)
+        except OSError as error:
+            self.stderr.write(f'{name}: {error}')
+            return False
+        return True
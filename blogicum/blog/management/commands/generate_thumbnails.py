@@ -0,0 +1,71 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.images import generate_renditions
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Заранее создаёт производные изображения для недавно изменённых '
+        'публикаций, чтобы посетители не ждали их генерации.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            type=float,
+            default=60,
+            help='Обработать публикации, изменённые за столько минут.'
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            dest='all_posts',
+            help='Обработать все публикации с изображениями.'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Работать постоянно.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=30,
+            help='Пауза между проходами в режиме --loop, в секундах.'
+        )
+
+    def handle(self, *args, since=None, all_posts=False, loop=False,
+               interval=None, **options):
+        window = timedelta(minutes=since)
+        while True:
+            started = timezone.now()
+            posts = Post.objects.exclude(image='')
+            if not all_posts:
+                posts = posts.filter(updated_at__gte=started - window)
+            generated = self.generate(
+                posts.values_list('image', flat=True).distinct().iterator()
+            )
+            if generated:
+                self.stdout.write(f'Обработано изображений: {generated}')
+            if not loop:
+                return
+            time.sleep(interval)
+            # Следующий проход перекрывает предыдущий на его длительность.
+            window = timezone.now() - started
+            all_posts = False
+
+    def generate(self, names):
+        generated = 0
+        for name in names:
+            try:
+                generate_renditions(name)
+            except OSError as error:
+                self.stderr.write(f'{name}: {error}')
+                continue
+            generated += 1
+        return generated
@@ -0,0 +1,88 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.cache import bump_generations
+from blog.models import Post, visible_posts
+
+BATCH_SIZE = 500
+
+
+def set_visible(posts, is_visible):
+    """Переключает is_visible и сбрасывает кэш затронутых страниц."""
+    changed = 0
+    while True:
+        batch = list(
+            posts.values_list('pk', 'category__slug')[:BATCH_SIZE]
+        )
+        if not batch:
+            return changed
+        Post.objects.filter(pk__in=[pk for pk, _ in batch]).update(
+            is_visible=is_visible,
+            updated_at=timezone.now()
+        )
+        bump_generations(
+            'feed',
+            'posts',
+            *{f'post:{pk}' for pk, _ in batch},
+            *{f'category:{slug}' for _, slug in batch if slug}
+        )
+        changed += len(batch)
+
+
+class Command(BaseCommand):
+    help = (
+        'Открывает в ленте отложенные публикации, дата которых наступила, '
+        'и сбрасывает кэш страниц с ними.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Работать постоянно, проверяя расписание.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=settings.PUBLISH_SCHEDULED_INTERVAL,
+            help='Максимальная пауза между проверками, в секундах.'
+        )
+
+    def handle(self, *args, loop=False, interval=None, **options):
+        while True:
+            now = timezone.now()
+            published = set_visible(
+                Post.objects.filter(visible_posts(now), is_visible=False),
+                True
+            )
+            # Дату публикации могли перенести в будущее через update().
+            withdrawn = set_visible(
+                Post.objects.filter(is_visible=True, pub_date__gt=now),
+                False
+            )
+            if published or withdrawn:
+                self.stdout.write(
+                    f'Опубликовано: {published}, отложено: {withdrawn}'
+                )
+            if not loop:
+                return
+            time.sleep(self.get_pause(interval))
+
+    def get_pause(self, interval):
+        next_pub_date = (
+            Post.objects.filter(
+                is_published=True,
+                is_visible=False,
+                pub_date__gt=timezone.now()
+            )
+            .order_by('pub_date')
+            .values_list('pub_date', flat=True)
+            .first()
+        )
+        if next_pub_date is None:
+            return interval
+        until_next = (next_pub_date - timezone.now()).total_seconds()
+        return min(interval, max(until_next, 0))
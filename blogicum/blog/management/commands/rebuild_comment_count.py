@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Now
+
+from blog.cache import bump_generations
+from blog.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики комментариев всех публикаций.'
+
+    def handle(self, *args, **options):
+        published_comments = (
+            Comment.objects
+            .filter(post=OuterRef('pk'), is_published=True)
+            .order_by()
+            .values('post')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        comment_count = Coalesce(Subquery(published_comments), 0)
+        # updated_at входит в ключ кэша карточки: меняется только у
+        # публикаций с исправленным счётчиком.
+        updated = Post.objects.exclude(comment_count=comment_count).update(
+            comment_count=comment_count,
+            updated_at=Now()
+        )
+        if updated:
+            bump_generations('feed', 'site')
+        self.stdout.write(
+            self.style.SUCCESS(f'Исправлено счётчиков: {updated}')
+        )
@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blog.notifications import send_digests
+
+
+class Command(BaseCommand):
+    help = (
+        'Собирает новые публикации в сводки и ставит их в очередь '
+        'EmailOutbox, по одной на получателя.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Работать постоянно, отправляя сводку раз в окно.'
+        )
+        parser.add_argument(
+            '--window',
+            type=float,
+            default=settings.DIGEST_WINDOW,
+            help='Окно сбора сводки, в секундах.'
+        )
+
+    def handle(self, *args, loop=False, window=None, **options):
+        while True:
+            digests, events = send_digests()
+            if events:
+                self.stdout.write(
+                    f'Сводок: {digests}, публикаций в них: {events}'
+                )
+            if not loop:
+                return
+            time.sleep(window)
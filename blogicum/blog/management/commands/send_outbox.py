@@ -0,0 +1,54 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blog.outbox import OUTBOX_BATCH_SIZE, claim_batch, send_batch
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди EmailOutbox.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Работать постоянно, проверяя очередь.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=settings.OUTBOX_INTERVAL,
+            help='Пауза между проверками пустой очереди, в секундах.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=OUTBOX_BATCH_SIZE,
+            help='Сколько писем отправлять через одно соединение.'
+        )
+
+    def handle(self, *args, loop=False, interval=None, batch_size=None,
+               **options):
+        while True:
+            try:
+                self.send_pending(batch_size)
+            except Exception as error:
+                if not loop:
+                    raise
+                # Рабочий процесс переживает сбой базы или почтового
+                # сервера и повторяет проход после паузы.
+                self.stderr.write(f'{type(error).__name__}: {error}')
+            if not loop:
+                return
+            time.sleep(interval)
+
+    def send_pending(self, batch_size):
+        while True:
+            batch = claim_batch(batch_size)
+            if not batch:
+                return
+            sent = send_batch(batch)
+            self.stdout.write(
+                f'Отправлено: {sent}, ошибок: {len(batch) - sent}'
+            )
@@ -0,0 +1,154 @@
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    StreamingHttpResponse
+)
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+from .images import rendition_source
+from .storage import is_hashed_name
+
+MEDIA_ACCEL = settings.MEDIA_ACCEL
+MEDIA_ACCEL_PREFIX = settings.MEDIA_ACCEL_PREFIX
+MEDIA_MAX_AGE = settings.MEDIA_MAX_AGE
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+CHUNK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def is_immutable(name):
+    """Файл по этому имени никогда не меняется: имя оригинала содержит
+    хэш содержимого, а имя производного — ещё и RENDITION_VERSION.
+    """
+    return is_hashed_name(rendition_source(name) or name)
+
+
+def media_path(name):
+    if any(part.startswith('.') for part in name.split('/')):
+        # Временные файлы загрузок и служебные каталоги не отдаются.
+        raise Http404
+    try:
+        path = safe_join(settings.MEDIA_ROOT, name)
+    except SuspiciousFileOperation:
+        raise Http404
+    try:
+        stat_result = os.stat(path)
+    except OSError:
+        raise Http404
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise Http404
+    return path, stat_result
+
+
+def parse_range(header, size):
+    """(начало, конец) для одного диапазона, None — отдать файл целиком,
+    False — диапазон нельзя удовлетворить.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        # Несколько диапазонов и другие единицы: отдаётся весь файл.
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        length = int(end)
+        if not length:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def range_is_current(request, etag, last_modified):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def read_range(path, start, length):
+    with open(path, 'rb') as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+
+def serve_media(request, name):
+    """Отдаёт файл из MEDIA_ROOT с ETag, Last-Modified и Range.
+
+    Если задан MEDIA_ACCEL, тело ответа отдаёт фронтовой сервер по
+    заголовку X-Accel-Redirect или X-Sendfile: он же разбирает Range.
+    """
+    path, stat_result = media_path(name)
+    size = stat_result.st_size
+    last_modified = int(stat_result.st_mtime)
+    etag = f'"{stat_result.st_mtime_ns:x}-{size:x}"'
+
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        content_type, encoding = mimetypes.guess_type(path)
+        content_type = content_type or 'application/octet-stream'
+        requested_range = None
+        if MEDIA_ACCEL == 'x-accel-redirect':
+            response = HttpResponse(content_type=content_type)
+            response['X-Accel-Redirect'] = MEDIA_ACCEL_PREFIX + quote(name)
+        elif MEDIA_ACCEL == 'x-sendfile':
+            response = HttpResponse(content_type=content_type)
+            response['X-Sendfile'] = path
+        else:
+            header = request.META.get('HTTP_RANGE')
+            if header and range_is_current(request, etag, last_modified):
+                requested_range = parse_range(header, size)
+            if requested_range is False:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+            if requested_range is None:
+                response = FileResponse(
+                    open(path, 'rb'), content_type=content_type
+                )
+            else:
+                start, end = requested_range
+                response = StreamingHttpResponse(
+                    read_range(path, start, end - start + 1),
+                    status=206,
+                    content_type=content_type
+                )
+                response['Content-Range'] = f'bytes {start}-{end}/{size}'
+                response['Content-Length'] = end - start + 1
+        if encoding:
+            response['Content-Encoding'] = encoding
+        response['Accept-Ranges'] = 'bytes'
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    if is_immutable(name):
+        response['Cache-Control'] = (
+            f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+        )
+    else:
+        response['Cache-Control'] = f'public, max-age={MEDIA_MAX_AGE}'
+    return response
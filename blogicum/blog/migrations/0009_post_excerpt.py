@@ -0,0 +1,36 @@
+# Generated by Django 3.2.16 on 2026-10-18 01:39
+
+from django.db import migrations, models
+from django.template.defaultfilters import truncatewords
+
+EXCERPT_WORDS = 10
+BATCH_SIZE = 500
+
+
+def fill_excerpt(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    batch = []
+    posts = Post.objects.only('text').order_by('pk').iterator(BATCH_SIZE)
+    for post in posts:
+        post.excerpt = truncatewords(post.text, EXCERPT_WORDS)
+        batch.append(post)
+        if len(batch) == BATCH_SIZE:
+            Post.objects.bulk_update(batch, ('excerpt',))
+            batch = []
+    Post.objects.bulk_update(batch, ('excerpt',))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False, verbose_name='Анонс'),
+        ),
+        migrations.RunPython(fill_excerpt, migrations.RunPython.noop),
+    ]
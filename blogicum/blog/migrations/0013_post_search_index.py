@@ -0,0 +1,40 @@
+from django.db import migrations
+
+# Полнотекстовый индекс FTS5 есть только в SQLite; на других СУБД поиск
+# выполняется через icontains.
+CREATE_INDEX = (
+    'CREATE VIRTUAL TABLE IF NOT EXISTS blog_post_fts USING fts5('
+    'title, text, category, location, '
+    "tokenize = 'unicode61 remove_diacritics 2')"
+)
+FILL_INDEX = (
+    'INSERT INTO blog_post_fts(rowid, title, text, category, location) '
+    "SELECT p.id, p.title, p.text, COALESCE(c.title, ''), "
+    "COALESCE(l.name, '') "
+    'FROM blog_post p '
+    'LEFT JOIN blog_category c ON c.id = p.category_id '
+    'LEFT JOIN blog_location l ON l.id = p.location_id'
+)
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(CREATE_INDEX)
+    schema_editor.execute(FILL_INDEX)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS blog_post_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_post_is_visible'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
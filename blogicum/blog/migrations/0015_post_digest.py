@@ -0,0 +1,38 @@
+# Generated by Django 3.2.16 on 2026-10-18 01:54
+
+import blog.models
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0014_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='notification_recipients',
+            field=models.TextField(blank=True, help_text='Адреса через запятую или с новой строки. Если пусто, уведомления о новых публикациях уходят на адреса NOTIFICATION_RECIPIENTS.', validators=[blog.models.validate_recipients], verbose_name='Получатели уведомлений'),
+        ),
+        migrations.CreateModel(
+            name='DigestEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Добавлено')),
+                ('digested_at', models.DateTimeField(blank=True, null=True, verbose_name='Включено в сводку')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='digest_events', to='blog.post', verbose_name='Публикация')),
+            ],
+            options={
+                'verbose_name': 'событие сводки',
+                'verbose_name_plural': 'События сводки',
+                'ordering': ('created_at',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='digestevent',
+            index=models.Index(condition=models.Q(('digested_at__isnull', True)), fields=['created_at'], name='digest_pending_idx'),
+        ),
+    ]
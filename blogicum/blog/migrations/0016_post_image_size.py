@@ -0,0 +1,43 @@
+# Generated by Django 3.2.16 on 2026-10-18 01:58
+
+from django.core.files.images import get_image_dimensions
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+def fill_image_size(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    batch = []
+    posts = (
+        Post.objects.exclude(image='').only('image')
+        .order_by('pk').iterator(BATCH_SIZE)
+    )
+    for post in posts:
+        try:
+            with default_storage.open(post.image.name) as image:
+                post.image_size = list(get_image_dimensions(image))
+        except OSError:
+            continue
+        batch.append(post)
+        if len(batch) == BATCH_SIZE:
+            Post.objects.bulk_update(batch, ('image_size',))
+            batch = []
+    Post.objects.bulk_update(batch, ('image_size',))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0015_post_digest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_size',
+            field=models.JSONField(blank=True, editable=False, null=True, verbose_name='Размер изображения'),
+        ),
+        migrations.RunPython(fill_image_size, migrations.RunPython.noop),
+    ]
@@ -1,29 +1,67 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.cache import cache
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect
+from django.template.loader import render_to_string
 from django.urls import reverse_lazy
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
 
+from .cache import page_cache_key
 from .models import Comment, Post
+from .paginators import CursorPaginator, FeedPaginator
+from .templatetags.post_cards import render_post_card
 
+POSTS_PER_PAGE = settings.POSTS_PER_PAGE
+ANONYMOUS_PAGE_CACHE_TIMEOUT = settings.ANONYMOUS_PAGE_CACHE_TIMEOUT
+STREAM_MARKER = '<!-- blog:post-cards -->'
+
+
+class AuthorObjectMixin(LoginRequiredMixin):
+    """Пускает к объекту только его автора.
+
+    Объект, загруженный для проверки прав, возвращается из get_object(),
+    чтобы UpdateView и DeleteView не запрашивали его повторно.
+    """
 
-class PostMixin(LoginRequiredMixin):
-    model = Post
-    template_name = 'blog/create.html'
     login_url = 'login'
-    pk_url_kwarg = 'post_id'
+
+    def get_object_queryset(self):
+        return self.model.objects.all()
+
+    def get_author_redirect_url(self, obj):
+        return obj.get_absolute_url()
 
     def dispatch(self, request, *args, **kwargs):
-        obj = get_object_or_404(Post, pk=kwargs[self.pk_url_kwarg])
+        self.author_object = get_object_or_404(
+            self.get_object_queryset(),
+            pk=kwargs[self.pk_url_kwarg]
+        )
 
-        if obj.author != self.request.user and request.user.is_authenticated:
-            return redirect(obj.get_absolute_url())
+        if (self.author_object.author_id != request.user.pk
+                and request.user.is_authenticated):
+            return redirect(self.get_author_redirect_url(self.author_object))
 
         return super().dispatch(request, *args, **kwargs)
 
+    def get_object(self, queryset=None):
+        return self.author_object
 
-class CommentMixin(LoginRequiredMixin):
+
+class PostMixin(AuthorObjectMixin):
+    model = Post
+    template_name = 'blog/create.html'
+    pk_url_kwarg = 'post_id'
+
+    def get_object_queryset(self):
+        return Post.objects.select_related('location')
+
+
+class CommentMixin(AuthorObjectMixin):
     model = Comment
     template_name = 'blog/comment.html'
-    login_url = 'login'
     pk_url_kwarg = 'comment_id'
     post_pk_url_kwarg = 'post_id'
 
@@ -31,14 +69,106 @@ class CommentMixin(LoginRequiredMixin):
         post_id = self.kwargs[self.post_pk_url_kwarg]
         return reverse_lazy('blog:post_detail', kwargs={'post_id': post_id})
 
-    def dispatch(self, request, *args, **kwargs):
-        obj = get_object_or_404(
-            Comment,
-            pk=kwargs[self.pk_url_kwarg],
-            post__id=kwargs['post_id']
+    def get_object_queryset(self):
+        return Comment.objects.select_related('post').filter(
+            post__id=self.kwargs[self.post_pk_url_kwarg]
         )
 
-        if obj.author != self.request.user and request.user.is_authenticated:
-            return redirect(obj.post.get_absolute_url())
+    def get_author_redirect_url(self, obj):
+        return obj.post.get_absolute_url()
 
-        return super().dispatch(request, *args, **kwargs)
+
+class PostsPaginationMixin:
+    paginate_by = POSTS_PER_PAGE
+    paginator_class = FeedPaginator
+    cursor_kwarg = 'cursor'
+
+    def get_count_key(self):
+        return self.request.path
+
+    def get_paginator(self, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True, **kwargs):
+        return super().get_paginator(
+            queryset,
+            per_page,
+            orphans,
+            allow_empty_first_page,
+            count_key=self.get_count_key(),
+            **kwargs
+        )
+
+    def paginate_queryset(self, queryset, page_size):
+        if not settings.FEED_CURSOR_PAGINATION:
+            return super().paginate_queryset(queryset, page_size)
+
+        paginator = CursorPaginator(queryset, page_size)
+        page = paginator.get_page(self.request.GET.get(self.cursor_kwarg))
+        return paginator, page, page.object_list, page.has_other_pages()
+
+
+class AnonymousPageCacheMixin:
+    """Кэширует страницу целиком для анонимных посетителей.
+
+    Ключ включает поколения из get_cache_generations(): сигналы моделей
+    увеличивают их, и устаревшие страницы перестают находиться в кэше.
+    """
+
+    cache_generations = ('site',)
+
+    def get_cache_generations(self):
+        return self.cache_generations
+
+    def dispatch(self, request, *args, **kwargs):
+        if (request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated):
+            return super().dispatch(request, *args, **kwargs)
+
+        key = page_cache_key(request, self.get_cache_generations())
+        response = cache.get(key)
+        if response is not None:
+            return response
+
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200 and not response.streaming:
+            def store(rendered):
+                cache.set(key, rendered, ANONYMOUS_PAGE_CACHE_TIMEOUT)
+
+            if getattr(response, 'is_rendered', True):
+                store(response)
+            else:
+                response.add_post_render_callback(store)
+        return response
+
+
+class StreamingPostsMixin:
+    """Отдаёт страницу ленты потоком, если включён STREAM_FEED_PAGES.
+
+    Шаблон рендерится с меткой вместо карточек: сначала отправляется всё
+    до метки (head и шапка сайта), затем карточки по мере их рендеринга и
+    в конце остаток страницы.
+    """
+
+    def render_to_response(self, context, **response_kwargs):
+        if not settings.STREAM_FEED_PAGES:
+            return super().render_to_response(context, **response_kwargs)
+        page = render_to_string(
+            self.get_template_names(),
+            {**context, 'stream_marker': mark_safe(STREAM_MARKER)},
+            self.request
+        )
+        head, tail = page.split(STREAM_MARKER, 1)
+        response_kwargs.setdefault('content_type', self.content_type)
+        return StreamingHttpResponse(
+            self.stream_page(head, context['page_obj'].object_list, tail),
+            **response_kwargs
+        )
+
+    def stream_page(self, head, posts, tail):
+        yield head
+        if isinstance(posts, QuerySet):
+            posts = posts.iterator()
+        for post in posts:
+            yield format_html(
+                '<article class="mb-5">{}</article>', render_post_card(post)
+            )
+        yield tail
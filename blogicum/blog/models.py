@@ -1,14 +1,33 @@
+import os
+import uuid
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.core.files.images import get_image_dimensions
+from django.core.validators import validate_email
+from django.db import models, transaction
 from django.template.defaultfilters import truncatewords
 from django.urls import reverse
+from django.utils import timezone
 
+from .images import normalize_upload
+from .storage import post_image_storage
 
 TITLE_MAX_LENGTH = settings.TITLE_MAX_LENGTH
+UPLOAD_STAGING_ROOT = settings.UPLOAD_STAGING_ROOT
+EXCERPT_WORDS = 10
 User = get_user_model()
 
 
+def split_recipients(value):
+    return value.replace(',', ' ').split()
+
+
+def validate_recipients(value):
+    for address in split_recipients(value):
+        validate_email(address)
+
+
 class BaseModel(models.Model):
     is_published = models.BooleanField(
         'Опубликовано',
@@ -38,6 +57,16 @@ class Category(BaseModel):
             'разрешены символы латиницы, цифры, дефис и подчёркивание.'
         )
     )
+    notification_recipients = models.TextField(
+        'Получатели уведомлений',
+        blank=True,
+        validators=(validate_recipients,),
+        help_text=(
+            'Адреса через запятую или с новой строки. Если пусто, '
+            'уведомления о новых публикациях уходят на адреса '
+            'NOTIFICATION_RECIPIENTS.'
+        )
+    )
 
     class Meta:
         verbose_name = 'категория'
@@ -46,6 +75,9 @@ class Category(BaseModel):
     def __str__(self):
         return truncatewords(self.title, 15)
 
+    def get_notification_recipients(self):
+        return split_recipients(self.notification_recipients)
+
 
 class Location(BaseModel):
     name = models.CharField(
@@ -61,12 +93,26 @@ class Location(BaseModel):
         return truncatewords(self.name, 15)
 
 
+def visible_posts(now=None):
+    """Условие, которому соответствуют публикации с is_visible."""
+    return models.Q(
+        is_published=True,
+        category__is_published=True,
+        pub_date__lte=now or timezone.now()
+    )
+
+
 class Post(BaseModel):
     title = models.CharField(
         max_length=TITLE_MAX_LENGTH,
         verbose_name='Заголовок'
     )
     text = models.TextField(verbose_name='Текст')
+    excerpt = models.TextField(
+        'Анонс',
+        blank=True,
+        editable=False
+    )
     pub_date = models.DateTimeField(
         verbose_name='Дата и время публикации',
         help_text=(
@@ -74,6 +120,16 @@ class Post(BaseModel):
             'отложенные публикации.'
         )
     )
+    is_visible = models.BooleanField(
+        'Видна в ленте',
+        default=False,
+        editable=False,
+        help_text=(
+            'Публикация и её категория опубликованы, дата публикации '
+            'наступила. Отложенные публикации открывает команда '
+            'publish_scheduled.'
+        )
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -96,18 +152,116 @@ class Post(BaseModel):
     image = models.ImageField(
         'Изображение',
         upload_to='post_images',
+        storage=post_image_storage,
         blank=True
     )
+    # [ширина, высота] заполняется в save(): width_field/height_field
+    # заставили бы ImageField читать файл при загрузке публикаций без
+    # размера.
+    image_size = models.JSONField(
+        'Размер изображения',
+        null=True,
+        blank=True,
+        editable=False
+    )
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False
+    )
+    updated_at = models.DateTimeField(
+        'Изменено',
+        auto_now=True,
+        help_text=(
+            'Меняется и при изменении автора, категории, местоположения '
+            'или числа комментариев.'
+        )
+    )
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         ordering = ('-pub_date',)
         default_related_name = 'posts'
+        indexes = (
+            models.Index(
+                fields=('pub_date',),
+                condition=models.Q(is_visible=True),
+                name='post_visible_pub_date_idx'
+            ),
+            models.Index(
+                fields=('category', 'pub_date'),
+                condition=models.Q(is_visible=True),
+                name='post_visible_category_idx'
+            ),
+            models.Index(
+                fields=('pub_date',),
+                condition=models.Q(is_published=True, is_visible=False),
+                name='post_scheduled_pub_date_idx'
+            ),
+            models.Index(
+                fields=('author', 'pub_date'),
+                name='post_author_pub_date_idx'
+            ),
+            # gc_media проверяет имена файлов пачками по image IN (...).
+            models.Index(fields=('image',), name='post_image_idx'),
+        )
 
     def __str__(self):
         return truncatewords(self.title, 15)
 
+    def update_derived_fields(self):
+        self.excerpt = truncatewords(self.text, EXCERPT_WORDS)
+        self.is_visible = (
+            self.is_published
+            and self.pub_date <= timezone.now()
+            and self.category is not None
+            and self.category.is_published
+        )
+
+    @property
+    def image_width(self):
+        return self.image_size[0] if self.image_size else None
+
+    @property
+    def image_height(self):
+        return self.image_size[1] if self.image_size else None
+
+    def process_image(self):
+        """Нормализует только что загруженное изображение и запоминает
+        размер нового файла.
+        """
+        if not self.image:
+            self.image_size = None
+        elif not self.image._committed:
+            try:
+                upload, width, height = normalize_upload(self.image.file)
+            except OSError:
+                return
+            self.image = upload
+            self.image_size = [width, height]
+        elif (not self.image_size
+              or self.image.name != self._initial_image_name):
+            # Файл сохранён в хранилище в обход формы (FieldFile.save).
+            try:
+                self.image_size = list(get_image_dimensions(self.image))
+            except OSError:
+                self.image_size = None
+
+    def save(self, *args, **kwargs):
+        self.update_derived_fields()
+        self.process_image()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = {
+                *update_fields, 'excerpt', 'is_visible', 'updated_at'
+            }
+            if 'image' in update_fields:
+                update_fields.add('image_size')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+        self._initial_image_name = self.image.name
+
     def get_absolute_url(self):
         # С помощью функции reverse() возвращаем URL объекта.
         return reverse('blog:post_detail', kwargs={'post_id': self.pk})
@@ -132,3 +286,162 @@ class Comment(BaseModel):
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ('created_at',)
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at'),
+                name='comment_post_created_at_idx'
+            ),
+        )
+
+
+class StoredFile(models.Model):
+    """Счётчик публикаций, ссылающихся на файл изображения.
+
+    Одинаковые загрузки хранятся одним файлом; он удаляется, когда на него
+    не остаётся ссылок.
+    """
+
+    name = models.CharField('Имя файла', max_length=255, unique=True)
+    references = models.PositiveIntegerField('Ссылок', default=0)
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'файл изображения'
+        verbose_name_plural = 'Файлы изображений'
+
+    def __str__(self):
+        return self.name
+
+    @classmethod
+    def acquire(cls, name):
+        cls.objects.get_or_create(name=name)
+        cls.objects.filter(name=name).update(
+            references=models.F('references') + 1
+        )
+
+    @classmethod
+    def release(cls, name, storage=post_image_storage):
+        cls.objects.filter(name=name, references__gt=0).update(
+            references=models.F('references') - 1
+        )
+        if cls.objects.filter(name=name, references=0).delete()[0]:
+            transaction.on_commit(lambda: cls._delete_unused(name, storage))
+
+    @classmethod
+    def _delete_unused(cls, name, storage):
+        # До коммита такой же файл могли загрузить снова: _save() нашёл
+        # его на диске, и acquire() создал новую запись.
+        if not cls.objects.filter(name=name).exists():
+            storage.delete(name)
+
+
+class ChunkedUpload(models.Model):
+    """Изображение, которое загружается по частям.
+
+    Части дописываются в файл в UPLOAD_STAGING_ROOT; форма публикации
+    ссылается на завершённую загрузку по token.
+    """
+
+    token = models.UUIDField(
+        'Токен', default=uuid.uuid4, unique=True, editable=False
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь',
+        related_name='chunked_uploads'
+    )
+    filename = models.CharField('Имя файла', max_length=255)
+    size = models.PositiveBigIntegerField('Размер')
+    offset = models.PositiveBigIntegerField('Принято байт', default=0)
+    sha256 = models.CharField('SHA-256', max_length=64)
+    created_at = models.DateTimeField('Начата', auto_now_add=True)
+    completed_at = models.DateTimeField('Завершена', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'загрузка по частям'
+        verbose_name_plural = 'Загрузки по частям'
+
+    def __str__(self):
+        return self.filename
+
+    @property
+    def staging_path(self):
+        return os.path.join(UPLOAD_STAGING_ROOT, f'{self.token}.part')
+
+    def discard(self):
+        """Удаляет запись, а файл — после коммита транзакции."""
+        path = self.staging_path
+        self.delete()
+        transaction.on_commit(lambda: _remove_file(path))
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class DigestEvent(models.Model):
+    """Новая публикация, о которой ещё не сообщила команда send_digest."""
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        verbose_name='Публикация',
+        related_name='digest_events'
+    )
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+    digested_at = models.DateTimeField(
+        'Включено в сводку',
+        null=True,
+        blank=True
+    )
+
+    class Meta:
+        verbose_name = 'событие сводки'
+        verbose_name_plural = 'События сводки'
+        ordering = ('created_at',)
+        indexes = (
+            models.Index(
+                fields=('created_at',),
+                condition=models.Q(digested_at__isnull=True),
+                name='digest_pending_idx'
+            ),
+        )
+
+
+class EmailOutbox(models.Model):
+    """Письмо, ожидающее отправки командой send_outbox."""
+
+    subject = models.TextField('Тема')
+    body = models.TextField('Текст')
+    from_email = models.EmailField('Отправитель')
+    recipients = models.JSONField('Получатели')
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+    sent_at = models.DateTimeField('Отправлено', null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    next_attempt_at = models.DateTimeField(
+        'Следующая попытка',
+        null=True,
+        blank=True,
+        default=timezone.now,
+        help_text='Пусто, если попытки отправки исчерпаны.'
+    )
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta:
+        verbose_name = 'исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        ordering = ('created_at',)
+        indexes = (
+            models.Index(
+                fields=('next_attempt_at',),
+                condition=models.Q(sent_at__isnull=True),
+                name='outbox_pending_idx'
+            ),
+        )
+
+    def __str__(self):
+        return self.subject
@@ -0,0 +1,67 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.template.loader import get_template
+from django.utils import timezone
+
+from .models import DigestEvent, EmailOutbox
+from .outbox import enqueue_mail
+
+SERVICE_EMAIL = settings.SERVICE_EMAIL
+POST_NOTIFICATIONS = settings.POST_NOTIFICATIONS
+NOTIFICATION_RECIPIENTS = settings.NOTIFICATION_RECIPIENTS
+DIGEST_TEMPLATE = 'emails/post_digest.txt'
+
+
+def recipients_for(post):
+    if post.category is not None:
+        recipients = post.category.get_notification_recipients()
+        if recipients:
+            return recipients
+    return NOTIFICATION_RECIPIENTS
+
+
+def notify_new_post(post):
+    if POST_NOTIFICATIONS == 'digest':
+        DigestEvent.objects.create(post=post)
+        return
+    enqueue_mail(
+        subject=f'New post added - {post.title}',
+        message=f'{post.author.username} add post!',
+        from_email=SERVICE_EMAIL,
+        recipient_list=recipients_for(post),
+    )
+
+
+def send_digests(now=None):
+    """Ставит в очередь EmailOutbox по одной сводке на получателя.
+
+    Возвращает число сводок и число вошедших в них событий.
+    """
+    now = now or timezone.now()
+    template = get_template(DIGEST_TEMPLATE)
+    with transaction.atomic():
+        events = list(
+            DigestEvent.objects
+            .filter(digested_at__isnull=True, created_at__lte=now)
+            .select_related('post__author', 'post__category')
+            .order_by('created_at')
+        )
+        posts_by_recipient = defaultdict(list)
+        for event in events:
+            for recipient in recipients_for(event.post):
+                posts_by_recipient[recipient].append(event.post)
+        EmailOutbox.objects.bulk_create(
+            EmailOutbox(
+                subject=f'New posts digest - {len(posts)}',
+                body=template.render({'posts': posts}),
+                from_email=SERVICE_EMAIL,
+                recipients=[recipient],
+            )
+            for recipient, posts in posts_by_recipient.items()
+        )
+        DigestEvent.objects.filter(
+            pk__in=[event.pk for event in events]
+        ).update(digested_at=now)
+    return len(posts_by_recipient), len(events)
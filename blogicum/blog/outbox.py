@@ -0,0 +1,100 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+OUTBOX_BATCH_SIZE = settings.OUTBOX_BATCH_SIZE
+OUTBOX_MAX_ATTEMPTS = settings.OUTBOX_MAX_ATTEMPTS
+OUTBOX_RETRY_DELAY = settings.OUTBOX_RETRY_DELAY
+# На это время взятые в работу письма скрываются от других обработчиков.
+OUTBOX_LEASE = timedelta(minutes=5)
+
+
+def enqueue_mail(subject, message, from_email, recipient_list):
+    """Ставит письмо в очередь; оно уйдёт только если транзакция
+    будет зафиксирована.
+    """
+    return EmailOutbox.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email,
+        recipients=list(recipient_list),
+    )
+
+
+def pending_mail(now=None):
+    return EmailOutbox.objects.filter(
+        sent_at__isnull=True,
+        next_attempt_at__lte=now or timezone.now()
+    )
+
+
+def claim_batch(batch_size=OUTBOX_BATCH_SIZE):
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            pending_mail(now)
+            .select_for_update(skip_locked=True)
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        EmailOutbox.objects.filter(pk__in=[mail.pk for mail in batch]).update(
+            next_attempt_at=now + OUTBOX_LEASE
+        )
+    return batch
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=OUTBOX_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def record_failure(mail, error):
+    mail.attempts += 1
+    mail.last_error = f'{type(error).__name__}: {error}'
+    mail.next_attempt_at = (
+        timezone.now() + retry_delay(mail.attempts)
+        if mail.attempts < OUTBOX_MAX_ATTEMPTS else None
+    )
+
+
+def send_batch(batch, connection=None):
+    """Отправляет письма через одно соединение, возвращает число
+    отправленных.
+
+    Если соединение не открылось или оборвалось, ошибка записывается всем
+    письмам пачки, до которых не дошла очередь.
+    """
+    if not batch:
+        return 0
+    connection = connection or get_connection()
+    sent = attempted = 0
+    try:
+        with connection:
+            for mail in batch:
+                attempted += 1
+                try:
+                    EmailMessage(
+                        mail.subject,
+                        mail.body,
+                        mail.from_email,
+                        mail.recipients,
+                        connection=connection,
+                    ).send()
+                except Exception as error:
+                    record_failure(mail, error)
+                else:
+                    mail.attempts += 1
+                    mail.sent_at = timezone.now()
+                    mail.last_error = ''
+                    sent += 1
+    except Exception as error:
+        for mail in batch[attempted:]:
+            record_failure(mail, error)
+    EmailOutbox.objects.bulk_update(
+        batch,
+        ('attempts', 'sent_at', 'next_attempt_at', 'last_error')
+    )
+    return sent
@@ -0,0 +1,230 @@
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, Page, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .cache import get_generation
+
+FEED_COUNT_CACHE_TIMEOUT = settings.FEED_COUNT_CACHE_TIMEOUT
+FEED_COUNT_LIMIT = settings.FEED_COUNT_LIMIT
+
+
+class FeedPage(Page):
+    def has_next(self):
+        paginator = self.paginator
+        if paginator.count_is_estimated and self.number >= paginator.num_pages:
+            return len(self.object_list) == paginator.per_page
+        return super().has_next()
+
+    @property
+    def elided_page_range(self):
+        return self.paginator.get_elided_page_range(
+            self.number,
+            on_each_side=2,
+            on_ends=1
+        )
+
+
+class FeedPaginator(Paginator):
+    """Paginator, который кэширует число объектов по ключу выборки.
+
+    Кэш сбрасывается сменой поколения публикаций при их изменении.
+    Если объектов больше FEED_COUNT_LIMIT, точное число не считается:
+    страницы за пределами оценки остаются доступными по номеру.
+    """
+
+    def __init__(self, object_list, per_page, orphans=0,
+                 allow_empty_first_page=True, count_key=None):
+        super().__init__(object_list, per_page, orphans,
+                         allow_empty_first_page)
+        self.count_key = count_key
+
+    def _get_page(self, *args, **kwargs):
+        return FeedPage(*args, **kwargs)
+
+    @cached_property
+    def _counted(self):
+        if self.count_key is None:
+            return self._bounded_count()
+        key = f'blog:count:{get_generation("posts")}:{self.count_key}'
+        counted = cache.get(key)
+        if counted is None:
+            counted = self._bounded_count()
+            cache.set(key, counted, FEED_COUNT_CACHE_TIMEOUT)
+        return counted
+
+    def _bounded_count(self):
+        count = self.object_list[:FEED_COUNT_LIMIT + 1].count()
+        if count > FEED_COUNT_LIMIT:
+            return FEED_COUNT_LIMIT, True
+        return count, False
+
+    @property
+    def count(self):
+        return self._counted[0]
+
+    @property
+    def count_is_estimated(self):
+        return self._counted[1]
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            if self.count_is_estimated and int(number) > self.num_pages:
+                return int(number)
+            raise
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.count_is_estimated or number < self.num_pages:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(
+            self.object_list[bottom:bottom + self.per_page],
+            number,
+            self
+        )
+
+
+class CursorPage:
+    def __init__(self, object_list, paginator, next_cursor=None,
+                 previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Keyset-пагинация: страница ищется по значениям полей сортировки
+    последнего показанного объекта, без OFFSET и без COUNT(*).
+    """
+
+    cursor_mode = True
+    page_class = CursorPage
+
+    def __init__(self, object_list, per_page, ordering=('-pub_date', '-pk')):
+        self.object_list = object_list.order_by(*ordering)
+        self.per_page = int(per_page)
+        self.ordering = ordering
+
+    def get_page(self, cursor=None):
+        position = self.decode_cursor(cursor)
+        if position is None:
+            return self._forward_page()
+        direction, values = position
+        if direction == 'p':
+            return self._backward_page(values)
+        return self._forward_page(values)
+
+    def _forward_page(self, values=None):
+        queryset = self.object_list
+        if values is not None:
+            queryset = queryset.filter(self._keyset_filter(values, True))
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        return self.page_class(
+            rows,
+            self,
+            next_cursor=(
+                self.encode_cursor('n', rows[-1]) if has_more else None
+            ),
+            previous_cursor=(
+                self.encode_cursor('p', rows[0])
+                if values is not None and rows else None
+            ),
+        )
+
+    def _backward_page(self, values):
+        reversed_ordering = [
+            field[1:] if field.startswith('-') else f'-{field}'
+            for field in self.ordering
+        ]
+        queryset = (
+            self.object_list
+            .filter(self._keyset_filter(values, False))
+            .order_by(*reversed_ordering)
+        )
+        rows = list(queryset[:self.per_page + 1])
+        if not rows:
+            return self._forward_page()
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page][::-1]
+        return self.page_class(
+            rows,
+            self,
+            next_cursor=self.encode_cursor('n', rows[-1]),
+            previous_cursor=(
+                self.encode_cursor('p', rows[0]) if has_more else None
+            ),
+        )
+
+    def _field_names(self):
+        return [field.lstrip('-') for field in self.ordering]
+
+    def _keyset_filter(self, values, forward):
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') == forward else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def _model_field(self, name):
+        opts = self.object_list.model._meta
+        return opts.pk if name == 'pk' else opts.get_field(name)
+
+    def encode_cursor(self, direction, obj):
+        values = [
+            self._model_field(name).value_to_string(obj)
+            for name in self._field_names()
+        ]
+        raw = json.dumps([direction, *values], separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            direction, *values = json.loads(raw)
+            names = self._field_names()
+            if direction not in ('n', 'p') or len(values) != len(names):
+                return None
+            return direction, [
+                self._model_field(name).to_python(value)
+                for name, value in zip(names, values)
+            ]
+        except (binascii.Error, ValueError, TypeError, ValidationError):
+            return None
@@ -0,0 +1,144 @@
+import re
+
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+FTS_TABLE = 'blog_post_fts'
+# Столбцы: заголовок, текст, категория, местоположение.
+BM25_WEIGHTS = (10.0, 1.0, 4.0, 4.0)
+SNIPPET_TOKENS = 24
+MARK_START, MARK_END = '\x02', '\x03'
+
+INDEXED_POSTS = (
+    "SELECT p.id, p.title, p.text, COALESCE(c.title, ''), "
+    "COALESCE(l.name, '') "
+    'FROM blog_post p '
+    'LEFT JOIN blog_category c ON c.id = p.category_id '
+    'LEFT JOIN blog_location l ON l.id = p.location_id'
+)
+
+
+def is_supported():
+    return connection.vendor == 'sqlite'
+
+
+def create_index(cursor):
+    cursor.execute(
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+        'title, text, category, location, '
+        "tokenize = 'unicode61 remove_diacritics 2')"
+    )
+
+
+def _remove(where, params):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid IN '
+            f'(SELECT p.id FROM blog_post p WHERE {where})',
+            params
+        )
+
+
+def _insert(where, params):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE}'
+            '(rowid, title, text, category, location) '
+            f'{INDEXED_POSTS} WHERE {where}',
+            params
+        )
+
+
+def _reindex(where, params):
+    if is_supported():
+        _remove(where, params)
+        _insert(where, params)
+
+
+def index_post(post_id):
+    _reindex('p.id = %s', [post_id])
+
+
+def index_category_posts(category_id):
+    _reindex('p.category_id = %s', [category_id])
+
+
+def index_location_posts(location_id):
+    _reindex('p.location_id = %s', [location_id])
+
+
+def remove_post(post_id):
+    if is_supported():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id]
+            )
+
+
+def remove_category_posts(category_id):
+    if is_supported():
+        _remove('p.category_id = %s', [category_id])
+
+
+def remove_location_posts(location_id):
+    if is_supported():
+        _remove('p.location_id = %s', [location_id])
+
+
+def index_missing_posts():
+    if is_supported():
+        _insert(f'p.id NOT IN (SELECT rowid FROM {FTS_TABLE})', [])
+
+
+def rebuild_index():
+    with connection.cursor() as cursor:
+        create_index(cursor)
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE}'
+            f'(rowid, title, text, category, location) {INDEXED_POSTS}'
+        )
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')"
+        )
+        cursor.execute(f'SELECT count(*) FROM {FTS_TABLE}')
+        return cursor.fetchone()[0]
+
+
+def match_expression(query):
+    # Каждое слово ищется по префиксу; кавычки и операторы FTS5 отбрасываются.
+    terms = re.findall(r'\w+', query)
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def highlight(snippet):
+    return mark_safe(
+        escape(snippet)
+        .replace(MARK_START, '<mark>')
+        .replace(MARK_END, '</mark>')
+    )
+
+
+def find_posts(query, limit, offset=0, visible_only=True):
+    """Возвращает пары (id публикации, фрагмент с подсветкой) по bm25."""
+    expression = match_expression(query)
+    if not expression:
+        return []
+    weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+    visible = 'AND p.is_visible ' if visible_only else ''
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT {FTS_TABLE}.rowid, '
+            f"snippet({FTS_TABLE}, -1, %s, %s, '…', {SNIPPET_TOKENS}) "
+            f'FROM {FTS_TABLE} '
+            f'JOIN blog_post p ON p.id = {FTS_TABLE}.rowid '
+            f'WHERE {FTS_TABLE} MATCH %s {visible}'
+            f'ORDER BY bm25({FTS_TABLE}, {weights}) '
+            'LIMIT %s OFFSET %s',
+            [MARK_START, MARK_END, expression, limit, offset]
+        )
+        return [
+            (post_id, highlight(snippet))
+            for post_id, snippet in cursor.fetchall()
+        ]
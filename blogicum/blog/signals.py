@@ -0,0 +1,276 @@
+from django.contrib.auth import get_user_model
+from django.db.models import BooleanField, ExpressionWrapper, F, Q
+from django.db.models.signals import (
+    post_delete,
+    post_init,
+    post_save,
+    pre_delete,
+    pre_save
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import search
+from .autocomplete import index_for
+from .cache import bump_generations
+from .models import Category, Comment, Location, Post, StoredFile
+
+User = get_user_model()
+
+
+def change_comment_count(post_id, delta):
+    if post_id is None:
+        return
+    posts = Post.objects.filter(pk=post_id)
+    if delta < 0:
+        posts = posts.filter(comment_count__gte=-delta)
+    posts.update(
+        comment_count=F('comment_count') + delta,
+        updated_at=timezone.now()
+    )
+
+
+def counted_post_id(comment):
+    # Счётчик публикации учитывает только опубликованные комментарии.
+    return comment.post_id if comment.is_published else None
+
+
+@receiver(post_init, sender=Comment)
+def remember_counted_post(sender, instance, **kwargs):
+    instance._counted_post_id = (
+        counted_post_id(instance) if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Comment)
+def update_comment_count(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    post_id = counted_post_id(instance)
+    if post_id != instance._counted_post_id:
+        change_comment_count(instance._counted_post_id, -1)
+        change_comment_count(post_id, 1)
+        instance._counted_post_id = post_id
+
+
+# Публикации, которые удаляются вместе с комментариями. Из-за сигналов
+# Comment Django удаляет комментарии по одному объекту, а не одним
+# запросом, поэтому приёмники комментариев ничего не делают для таких
+# публикаций: страницы сбрасывает один раз invalidate_post_pages.
+deleting_post_ids = set()
+
+
+@receiver(pre_delete, sender=Post)
+def mark_deleting_post(sender, instance, **kwargs):
+    deleting_post_ids.add(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def unmark_deleting_post(sender, instance, **kwargs):
+    deleting_post_ids.discard(instance.pk)
+
+
+@receiver(post_delete, sender=Comment)
+def decrease_comment_count(sender, instance, **kwargs):
+    if instance.post_id in deleting_post_ids:
+        return
+    change_comment_count(instance._counted_post_id, -1)
+    instance._counted_post_id = None
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_post_counts(sender, **kwargs):
+    bump_generations('posts')
+
+
+@receiver(pre_save, sender=Post)
+def fill_loaded_post(sender, instance, raw=False, **kwargs):
+    # loaddata сохраняет объекты в обход Post.save() и auto_now.
+    if raw:
+        instance.update_derived_fields()
+        if instance.updated_at is None:
+            instance.updated_at = timezone.now()
+
+
+def category_generations(categories):
+    slugs = categories.values_list('slug', flat=True)
+    return [f'category:{slug}' for slug in slugs]
+
+
+@receiver(post_init, sender=Post)
+def remember_post_category(sender, instance, **kwargs):
+    instance._initial_category_id = instance.__dict__.get('category_id')
+
+
+@receiver(post_init, sender=Post)
+def remember_post_image(sender, instance, **kwargs):
+    image = instance.__dict__.get('image')
+    instance._initial_image_name = getattr(image, 'name', image) or None
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    category_ids = {instance._initial_category_id, instance.category_id}
+    bump_generations(
+        'feed',
+        f'post:{instance.pk}',
+        *category_generations(Category.objects.filter(pk__in=category_ids))
+    )
+    instance._initial_category_id = instance.category_id
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    if instance.post_id in deleting_post_ids:
+        return
+    # Число комментариев выводится в карточках ленты и категории.
+    bump_generations(
+        'feed',
+        f'post:{instance.post_id}',
+        *category_generations(
+            Category.objects.filter(posts=instance.post_id)
+        )
+    )
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_categories(sender, **kwargs):
+    bump_generations('site', 'taxonomy')
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def invalidate_site_pages(sender, **kwargs):
+    bump_generations('site')
+
+
+@receiver(post_save, sender=Category)
+def update_category_posts(sender, instance, **kwargs):
+    now = timezone.now()
+    is_visible = False
+    if instance.is_published:
+        is_visible = ExpressionWrapper(
+            Q(is_published=True, pub_date__lte=now),
+            output_field=BooleanField()
+        )
+    Post.objects.filter(category=instance).update(
+        is_visible=is_visible,
+        updated_at=now
+    )
+
+
+@receiver(pre_delete, sender=Category)
+def hide_category_posts(sender, instance, **kwargs):
+    Post.objects.filter(category=instance).update(
+        is_visible=False,
+        updated_at=timezone.now()
+    )
+
+
+@receiver(post_save, sender=Location)
+@receiver(pre_delete, sender=Location)
+def touch_location_posts(sender, instance, **kwargs):
+    Post.objects.filter(location=instance).update(updated_at=timezone.now())
+
+
+def is_login_update(update_fields):
+    # При входе пользователя сохраняется только last_login.
+    return update_fields is not None and set(update_fields) <= {'last_login'}
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_author_pages(sender, update_fields=None, **kwargs):
+    if not is_login_update(update_fields):
+        bump_generations('site')
+
+
+@receiver(post_save, sender=User)
+def touch_author_posts(sender, instance, created, update_fields=None,
+                       **kwargs):
+    if not created and not is_login_update(update_fields):
+        Post.objects.filter(author=instance).update(
+            updated_at=timezone.now()
+        )
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    search.index_post(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def remove_post_from_index(sender, instance, **kwargs):
+    search.remove_post(instance.pk)
+
+
+@receiver(post_save, sender=Category)
+def index_category_posts(sender, instance, created, **kwargs):
+    if not created:
+        search.index_category_posts(instance.pk)
+
+
+@receiver(post_save, sender=Location)
+def index_location_posts(sender, instance, created, **kwargs):
+    if not created:
+        search.index_location_posts(instance.pk)
+
+
+# При удалении категории или местоположения Django обнуляет ссылку у
+# публикаций UPDATE-запросом без сигналов: строки индекса снимаются до
+# удаления и добавляются заново после него.
+@receiver(pre_delete, sender=Category)
+def unindex_category_posts(sender, instance, **kwargs):
+    search.remove_category_posts(instance.pk)
+
+
+@receiver(pre_delete, sender=Location)
+def unindex_location_posts(sender, instance, **kwargs):
+    search.remove_location_posts(instance.pk)
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Location)
+def index_unlinked_posts(sender, **kwargs):
+    search.index_missing_posts()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(post_save, sender=User)
+def update_autocomplete(sender, instance, update_fields=None, **kwargs):
+    if is_login_update(update_fields):
+        return
+    index_for(sender).update(instance)
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Location)
+@receiver(post_delete, sender=User)
+def remove_from_autocomplete(sender, instance, **kwargs):
+    index_for(sender).remove(instance)
+
+
+@receiver(post_save, sender=Post)
+def count_image_references(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    old_name, new_name = instance._initial_image_name, instance.image.name
+    if old_name == new_name:
+        return
+    if new_name:
+        StoredFile.acquire(new_name)
+    if old_name:
+        StoredFile.release(old_name)
+
+
+@receiver(post_delete, sender=Post)
+def release_image(sender, instance, **kwargs):
+    if instance.image.name:
+        StoredFile.release(instance.image.name)
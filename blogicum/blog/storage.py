@@ -0,0 +1,73 @@
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+HASH_ALGORITHM = 'sha256'
+# post_images/ab/cdef….jpg: первые два символа хэша — подкаталог, чтобы в
+# одном каталоге не оказалось слишком много файлов.
+HASHED_NAME_RE = re.compile(r'(?:^|/)[0-9a-f]{2}/[0-9a-f]{62}(?:\.\w+)?$')
+
+
+def is_hashed_name(name):
+    """Имя содержит хэш содержимого: файл по нему никогда не меняется."""
+    return HASHED_NAME_RE.search(name) is not None
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, которое называет файлы по SHA-256 их содержимого.
+
+    Хэш считается при потоковой записи во временный файл рядом с целевым
+    каталогом; одинаковые файлы сохраняются один раз. Учёт ссылок на файлы
+    ведёт модель StoredFile.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Имя определяется содержимым в _save(); существующий файл с тем же
+        # хэшем переиспользуется.
+        return name
+
+    def _save(self, name, content):
+        directory = posixpath.dirname(name)
+        extension = posixpath.splitext(name)[1].lower()
+        full_directory = self.path(directory)
+        os.makedirs(full_directory, exist_ok=True)
+
+        digest = hashlib.new(HASH_ALGORITHM)
+        content.seek(0)
+        with tempfile.NamedTemporaryFile(
+                dir=full_directory, prefix='.upload-', delete=False
+        ) as temporary:
+            try:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temporary.write(chunk)
+            except BaseException:
+                temporary.close()
+                os.unlink(temporary.name)
+                raise
+
+        hexdigest = digest.hexdigest()
+        name = posixpath.join(
+            directory, hexdigest[:2], f'{hexdigest[2:]}{extension}'
+        )
+        full_path = self.path(name)
+        if os.path.exists(full_path):
+            os.unlink(temporary.name)
+            # Свежее время изменения защищает переиспользованный файл от
+            # удаления командой gc_media.
+            os.utime(full_path)
+        else:
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            os.replace(temporary.name, full_path)
+            if self.file_permissions_mode is not None:
+                os.chmod(full_path, self.file_permissions_mode)
+        return name
+
+
+post_image_storage = ContentAddressedStorage()
@@ -0,0 +1,45 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+POST_CARD_CACHE_TIMEOUT = settings.POST_CARD_CACHE_TIMEOUT
+POST_CARD_KEY = 'blog:post_card:{}:{}'
+
+register = template.Library()
+
+
+def post_card_key(post):
+    return POST_CARD_KEY.format(post.pk, post.updated_at.timestamp())
+
+
+def render_post_card(post):
+    """HTML одной карточки, для потоковой отдачи страницы."""
+    key = post_card_key(post)
+    card = cache.get(key)
+    if card is None:
+        card = render_to_string('includes/post_card.html', {'post': post})
+        cache.set(key, card, POST_CARD_CACHE_TIMEOUT)
+    return mark_safe(card)
+
+
+@register.simple_tag
+def render_post_cards(posts):
+    """Возвращает HTML карточек публикаций.
+
+    Все карточки страницы читаются из кэша одним get_many; ключ содержит
+    updated_at публикации, который меняется и при изменении её автора,
+    категории, местоположения или числа комментариев.
+    """
+    cards = {post_card_key(post): post for post in posts}
+    rendered = cache.get_many(cards)
+    missing = {
+        key: render_to_string('includes/post_card.html', {'post': post})
+        for key, post in cards.items()
+        if key not in rendered
+    }
+    if missing:
+        cache.set_many(missing, POST_CARD_CACHE_TIMEOUT)
+        rendered.update(missing)
+    return [mark_safe(rendered[key]) for key in cards]
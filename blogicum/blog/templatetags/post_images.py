@@ -0,0 +1,38 @@
+from django import template
+
+from blog.images import FORMATS, rendition_size, rendition_url
+
+register = template.Library()
+
+
+def srcset(image, renditions, image_format):
+    return ', '.join(
+        f'{rendition_url(image.name, rendition, image_format)} {density}x'
+        for density, rendition in enumerate(renditions, start=1)
+    )
+
+
+@register.inclusion_tag('includes/post_picture.html')
+def post_picture(image, rendition, hidpi=None, alt='', css_class='',
+                 lazy=True):
+    """<picture> с производными изображениями вместо оригинала.
+
+    WebP браузер выбирает сам через <source type="image/webp">, JPEG
+    остаётся запасным вариантом; hidpi — рендишн для плотности 2x.
+    """
+    renditions = [rendition, hidpi] if hidpi else [rendition]
+    width, height = rendition_size(image, rendition)
+    return {
+        'sources': [
+            (content_type, srcset(image, renditions, image_format))
+            for image_format, (_, content_type) in FORMATS.items()
+            if image_format != 'jpeg'
+        ],
+        'src': rendition_url(image.name, rendition, 'jpeg'),
+        'srcset': srcset(image, renditions, 'jpeg'),
+        'width': width,
+        'height': height,
+        'alt': alt,
+        'css_class': css_class,
+        'lazy': lazy,
+    }
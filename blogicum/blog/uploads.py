@@ -0,0 +1,141 @@
+import hashlib
+import os
+import posixpath
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from .models import UPLOAD_STAGING_ROOT, ChunkedUpload
+
+UPLOAD_CHUNK_SIZE = settings.UPLOAD_CHUNK_SIZE
+UPLOAD_MAX_SIZE = settings.UPLOAD_MAX_SIZE
+UPLOAD_EXPIRY = settings.UPLOAD_EXPIRY
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+READ_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """Ошибка загрузки по частям; status — код ответа для клиента."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def start_upload(user, filename, size, sha256):
+    filename = posixpath.basename(filename.replace('\\', '/'))
+    if posixpath.splitext(filename)[1].lower() not in IMAGE_EXTENSIONS:
+        raise UploadError('Можно загрузить только изображение.')
+    if not 0 < size <= UPLOAD_MAX_SIZE:
+        raise UploadError(
+            f'Размер файла должен быть не больше {UPLOAD_MAX_SIZE} байт.'
+        )
+    sha256 = sha256.lower()
+    if not SHA256_RE.match(sha256):
+        raise UploadError('Неверная контрольная сумма SHA-256.')
+    upload = ChunkedUpload.objects.create(
+        user=user, filename=filename, size=size, sha256=sha256
+    )
+    os.makedirs(UPLOAD_STAGING_ROOT, exist_ok=True)
+    open(upload.staging_path, 'wb').close()
+    return upload
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        while chunk := file.read(READ_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_image(path):
+    try:
+        with Image.open(path) as image:
+            image.verify()
+    except Exception:
+        # Pillow сообщает о повреждённых файлах разными исключениями.
+        return False
+    return True
+
+
+def write_chunk(path, offset, stream, length):
+    with open(path, 'r+b') as file:
+        # Обрыв мог оставить в файле непринятый хвост прошлой части.
+        file.seek(offset)
+        file.truncate()
+        while length:
+            chunk = stream.read(min(READ_SIZE, length))
+            if not chunk:
+                raise UploadError('Часть получена не полностью.')
+            file.write(chunk)
+            length -= len(chunk)
+
+
+def check_upload(upload):
+    """Проверяет собранный файл; при ошибке загрузка начинается заново."""
+    if file_digest(upload.staging_path) != upload.sha256:
+        error = UploadError('Контрольная сумма не совпала.', 422)
+    elif not is_image(upload.staging_path):
+        error = UploadError('Файл не является изображением.', 415)
+    else:
+        upload.completed_at = timezone.now()
+        return None
+    upload.offset = 0
+    return error
+
+
+def append_chunk(upload, offset, stream, length):
+    """Дописывает часть из потока запроса в файл загрузки.
+
+    Тело запроса читается блоками прямо в файл, без буфера в памяти и
+    временных файлов Django. Часть принимается, только если она
+    начинается с уже принятого смещения: после обрыва клиент узнаёт
+    смещение и продолжает с него. Последняя часть завершает загрузку,
+    если совпала контрольная сумма.
+    """
+    if length > UPLOAD_CHUNK_SIZE:
+        raise UploadError(
+            f'Часть должна быть не больше {UPLOAD_CHUNK_SIZE} байт.', 413
+        )
+    error = None
+    with transaction.atomic():
+        upload = ChunkedUpload.objects.select_for_update().get(pk=upload.pk)
+        if upload.completed_at:
+            raise UploadError('Загрузка уже завершена.', 409)
+        if offset != upload.offset:
+            raise UploadError('Неверное смещение части.', 409)
+        if offset + length > upload.size:
+            raise UploadError('Часть выходит за размер файла.')
+        write_chunk(upload.staging_path, offset, stream, length)
+        upload.offset += length
+        if upload.offset == upload.size:
+            error = check_upload(upload)
+        upload.save(update_fields=('offset', 'completed_at'))
+    if error:
+        raise error
+    return upload
+
+
+def completed_upload(user, token):
+    return ChunkedUpload.objects.filter(
+        user=user, token=token, completed_at__isnull=False
+    ).first()
+
+
+def staged_file(upload):
+    return File(open(upload.staging_path, 'rb'), name=upload.filename)
+
+
+def expired_uploads(now=None):
+    return ChunkedUpload.objects.filter(
+        created_at__lt=(now or timezone.now()) - timedelta(
+            seconds=UPLOAD_EXPIRY
+        )
+    )
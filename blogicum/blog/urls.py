@@ -1,11 +1,19 @@
+import re
+
 from django.conf import settings
-from django.conf.urls.static import static
-from django.urls import path
+from django.urls import path, re_path
 
-from . import views
+from . import images, views
 
 app_name = 'blog'
 
+# Отсутствующие производные изображения создаются по запросу.
+RENDITION_PATTERN = (
+    rf'^{re.escape(settings.MEDIA_URL.lstrip("/"))}{images.RENDITIONS_DIR}/'
+    rf'v{images.RENDITION_VERSION}/'
+    r'(?P<rendition>[\w-]+)/(?P<source_name>.+)\.(?P<image_format>\w+)$'
+)
+
 urlpatterns = [
     path('', views.IndexView.as_view(), name='index'),
     path(
@@ -13,11 +21,38 @@ urlpatterns = [
         views.PostDetailView.as_view(pk_url_kwarg='post_id'),
         name='post_detail'
     ),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.PostCommentsView.as_view(pk_url_kwarg='post_id'),
+        name='post_comments'
+    ),
     path(
         'category/<slug:category_slug>/',
         views.CategoryPostsView.as_view(),
         name='category_posts'
     ),
+    re_path(
+        RENDITION_PATTERN,
+        views.RenditionView.as_view(),
+        name='rendition'
+    ),
+    path(
+        f'{settings.MEDIA_URL.lstrip("/")}<path:name>',
+        views.MediaView.as_view(),
+        name='media'
+    ),
+    path('search/', views.SearchView.as_view(), name='search'),
+    path(
+        'autocomplete/<str:kind>/',
+        views.AutocompleteView.as_view(),
+        name='autocomplete'
+    ),
+    path('uploads/', views.UploadView.as_view(), name='upload'),
+    path(
+        'uploads/<uuid:token>/',
+        views.UploadChunkView.as_view(),
+        name='upload_chunk'
+    ),
     path('posts/create/', views.CreatePostView.as_view(), name='create_post'),
     path(
         'posts/<int:post_id>/edit/',
@@ -66,9 +101,3 @@ urlpatterns = [
         name='profile'
     ),
 ]
-
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL,
-        document_root=settings.MEDIA_ROOT
-    )
@@ -1,76 +1,100 @@
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.models import User
-from django.core.mail import send_mail
-from django.core.paginator import Paginator
-from django.db.models import Count
-from django.http import Http404
-from django.shortcuts import get_object_or_404, render
-from django.utils import timezone
+from django.db import transaction
+from django.db.models import Q
+from django.core.files.storage import default_storage
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
 from django.urls import reverse_lazy, reverse
 from django.views.generic import (
     CreateView,
     DetailView,
     DeleteView,
     ListView,
-    View,
-    UpdateView
+    TemplateView,
+    UpdateView,
+    View
 )
 
-from .models import Category, Comment, Post
-from .mixins import CommentMixin, PostMixin
+from . import images, search, uploads
+from .autocomplete import indexes as autocomplete_indexes
+from .media import serve_media
+from .cache import taxonomy
+from .models import ChunkedUpload, Comment, Post
+from .notifications import notify_new_post
+from .paginators import CursorPaginator
+from .mixins import (
+    AnonymousPageCacheMixin,
+    CommentMixin,
+    PostMixin,
+    PostsPaginationMixin,
+    StreamingPostsMixin
+)
 from .forms import CommentForm, PostForm
 
+COMMENTS_PER_PAGE = settings.COMMENTS_PER_PAGE
 POSTS_PER_PAGE = settings.POSTS_PER_PAGE
-SERVICE_EMAIL = settings.SERVICE_EMAIL
+AUTOCOMPLETE_LIMIT = 10
+# В ленте полный текст не нужен: карточка выводит заранее сохранённый анонс.
+FEED_POST_FIELDS = tuple(
+    field.name for field in Post._meta.concrete_fields
+    if field.name != 'text'
+)
+FEED_RELATED_FIELDS = (
+    'author__username',
+    'category__title',
+    'category__slug',
+    'category__is_published',
+    'location__name',
+    'location__is_published',
+)
 
 
-def get_posts_queryset(
-        manager=Post.objects,
-        apply_filters=True,
-        apply_annotations=True
-):
+def get_posts_queryset(manager=Post.objects, apply_filters=True):
 
     queryset = (
         manager.select_related('category', 'author', 'location')
-        .prefetch_related('comment_set')
+        .only(*FEED_POST_FIELDS, *FEED_RELATED_FIELDS)
     )
 
     if apply_filters:
-        queryset = queryset.filter(
-            is_published=True,
-            category__is_published=True,
-            pub_date__lte=timezone.now()
-        )
-
-    if apply_annotations:
-        queryset = queryset.annotate(comment_count=Count('comment_set'))
+        queryset = queryset.filter(is_visible=True)
     return queryset.order_by('-pub_date')
 
 
-class IndexView(ListView):
+class IndexView(
+    AnonymousPageCacheMixin,
+    StreamingPostsMixin,
+    PostsPaginationMixin,
+    ListView
+):
     template_name = 'blog/index.html'
-    paginate_by = POSTS_PER_PAGE
+    cache_generations = ('site', 'feed')
 
     def get_queryset(self):
         return get_posts_queryset()
 
 
-class PostDetailView(DetailView):
+class PostDetailView(AnonymousPageCacheMixin, DetailView):
     model = Post
     template_name = 'blog/detail.html'
     context_object_name = 'post'
 
-    def get_object(self, queryset=None):
-        if queryset is None:
-            queryset = super().get_queryset()
+    def get_cache_generations(self):
+        return ('site', f'post:{self.kwargs[self.pk_url_kwarg]}')
 
+    def get_queryset(self):
+        return super().get_queryset().select_related(
+            'category',
+            'author',
+            'location'
+        )
+
+    def get_object(self, queryset=None):
         obj = super().get_object(queryset)
 
-        if ((obj.author != self.request.user)
-                and (not obj.is_published
-                     or not obj.category.is_published
-                     or obj.pub_date > timezone.now())):
+        if obj.author != self.request.user and not obj.is_visible:
             raise Http404
 
         return obj
@@ -78,21 +102,38 @@ class PostDetailView(DetailView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['form'] = CommentForm()
-        context['comments'] = self.object.comment_set.all()
+        context['comments'] = CursorPaginator(
+            # Скрытые в админке комментарии не выводятся и не входят в
+            # Post.comment_count.
+            self.object.comment_set.filter(
+                is_published=True
+            ).select_related('author'),
+            COMMENTS_PER_PAGE,
+            ordering=('created_at', 'pk')
+        ).get_page(self.request.GET.get('comments'))
         return context
 
 
-class CategoryPostsView(ListView):
+class PostCommentsView(PostDetailView):
+    template_name = 'includes/comment_list.html'
+
+
+class CategoryPostsView(
+    AnonymousPageCacheMixin,
+    StreamingPostsMixin,
+    PostsPaginationMixin,
+    ListView
+):
     template_name = 'blog/category.html'
-    paginate_by = POSTS_PER_PAGE
+
+    def get_cache_generations(self):
+        return ('site', f'category:{self.kwargs["category_slug"]}')
 
     def get_category(self):
-        category_slug = self.kwargs.get('category_slug')
-        return get_object_or_404(
-            Category,
-            slug=category_slug,
-            is_published=True
-        )
+        category = taxonomy.published_category(self.kwargs['category_slug'])
+        if category is None:
+            raise Http404
+        return category
 
     def get_queryset(self):
         return get_posts_queryset(manager=self.get_category().posts)
@@ -103,24 +144,174 @@ class CategoryPostsView(ListView):
         return context
 
 
+class SearchView(TemplateView):
+    template_name = 'blog/search.html'
+
+    def get_page_number(self):
+        try:
+            return max(int(self.request.GET.get('page', 1)), 1)
+        except ValueError:
+            return 1
+
+    def find_posts(self, query, offset):
+        # Запрашивается на одну публикацию больше, чтобы узнать о следующей
+        # странице без COUNT(*).
+        limit = POSTS_PER_PAGE + 1
+        if not search.is_supported():
+            posts = list(
+                get_posts_queryset().filter(
+                    Q(title__icontains=query) | Q(text__icontains=query)
+                )[offset:offset + limit]
+            )
+            for post in posts:
+                post.snippet = post.excerpt
+            return posts
+        found = search.find_posts(query, limit, offset)
+        posts = get_posts_queryset().in_bulk([pk for pk, _ in found])
+        results = []
+        for pk, snippet in found:
+            if pk in posts:
+                posts[pk].snippet = snippet
+                results.append(posts[pk])
+        return results
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()
+        number = self.get_page_number()
+        results = []
+        if query:
+            results = self.find_posts(query, (number - 1) * POSTS_PER_PAGE)
+        context.update(
+            query=query,
+            results=results[:POSTS_PER_PAGE],
+            page_number=number,
+            has_next=len(results) > POSTS_PER_PAGE,
+        )
+        return context
+
+
+class AutocompleteView(LoginRequiredMixin, View):
+    def get(self, request, kind):
+        index = autocomplete_indexes.get(kind)
+        if index is None:
+            raise Http404
+        found = index.search(request.GET.get('q', ''), AUTOCOMPLETE_LIMIT)
+        return JsonResponse(
+            {'results': [{'id': pk, 'text': label} for pk, label in found]}
+        )
+
+
+class RenditionView(View):
+    """Создаёт производное изображение при первом запросе.
+
+    Готовые файлы лежат в MEDIA_ROOT/renditions/ и должны отдаваться
+    веб-сервером; сюда попадают только запросы отсутствующих файлов.
+    """
+
+    def get(self, request, rendition, source_name, image_format):
+        if (rendition not in images.RENDITIONS
+                or image_format not in images.FORMATS
+                or not images.is_source_name(source_name)
+                or not default_storage.exists(source_name)):
+            raise Http404
+        name = images.generate_rendition(
+            source_name, rendition, image_format
+        )
+        return serve_media(request, name)
+
+
+class MediaView(View):
+    def get(self, request, name):
+        return serve_media(request, name)
+
+
+def upload_state(upload):
+    return {
+        'token': str(upload.token),
+        'offset': upload.offset,
+        'size': upload.size,
+        'chunk_size': uploads.UPLOAD_CHUNK_SIZE,
+        'complete': upload.completed_at is not None,
+    }
+
+
+class UploadView(LoginRequiredMixin, View):
+    """Начинает загрузку изображения по частям."""
+
+    def post(self, request):
+        try:
+            upload = uploads.start_upload(
+                request.user,
+                request.POST.get('filename', ''),
+                int(request.POST.get('size', 0)),
+                request.POST.get('sha256', '')
+            )
+        except ValueError:
+            return JsonResponse(
+                {'error': 'Неверный размер файла.'}, status=400
+            )
+        except uploads.UploadError as error:
+            return JsonResponse({'error': str(error)}, status=error.status)
+        return JsonResponse(upload_state(upload), status=201)
+
+
+class UploadChunkView(LoginRequiredMixin, View):
+    """GET — сколько байт уже принято, PUT — следующая часть.
+
+    Смещение части передаётся в заголовке Upload-Offset.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            self.upload = get_object_or_404(
+                ChunkedUpload, token=kwargs['token'], user=request.user
+            )
+        return super().dispatch(request, *args, **kwargs)
+
+    def get(self, request, token):
+        return JsonResponse(upload_state(self.upload))
+
+    def put(self, request, token):
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.headers['Content-Length'])
+        except (KeyError, ValueError):
+            return JsonResponse(
+                {'error': 'Нужны заголовки Upload-Offset и Content-Length.'},
+                status=400
+            )
+        try:
+            upload = uploads.append_chunk(
+                self.upload, offset, request, length
+            )
+        except uploads.UploadError as error:
+            self.upload.refresh_from_db()
+            return JsonResponse(
+                {'error': str(error), **upload_state(self.upload)},
+                status=error.status
+            )
+        return JsonResponse(upload_state(upload))
+
+
 class CreatePostView(LoginRequiredMixin, CreateView):
     model = Post
     form_class = PostForm
     template_name = 'blog/create.html'
 
+    def get_form_kwargs(self):
+        return {**super().get_form_kwargs(), 'user': self.request.user}
+
     def mail(self):
-        send_mail(
-            subject=f'New post added - {self.object.title}',
-            message=f'{self.object.author.username} add post!',
-            from_email=SERVICE_EMAIL,
-            recipient_list=['badger@badger.com'],
-            fail_silently=True,
-        )
+        notify_new_post(self.object)
 
     def form_valid(self, form):
         form.instance.author = self.request.user
-        response = super().form_valid(form)
-        self.mail()
+        # Уведомление сохраняется вместе с публикацией; отправляют его
+        # команды send_outbox и send_digest.
+        with transaction.atomic():
+            response = super().form_valid(form)
+            self.mail()
         return response
 
     def get_success_url(self):
@@ -131,6 +322,9 @@ class CreatePostView(LoginRequiredMixin, CreateView):
 class EditPostView(PostMixin, UpdateView):
     form_class = PostForm
 
+    def get_form_kwargs(self):
+        return {**super().get_form_kwargs(), 'user': self.request.user}
+
     def form_valid(self, form):
         form.instance.author = self.request.user
         return super().form_valid(form)
@@ -161,26 +355,33 @@ class EditProfileView(LoginRequiredMixin, UpdateView):
         return self.request.user
 
 
-class ProfileView(View):
+class ProfileView(StreamingPostsMixin, PostsPaginationMixin, ListView):
+    template_name = 'blog/profile.html'
 
-    def get(self, request, username=None):
-        profile = get_object_or_404(User, username=username)
-        if request.user == profile:
-            posts_list = get_posts_queryset(
-                manager=profile.posts,
-                apply_filters=False
-            )
-        else:
-            posts_list = get_posts_queryset(
-                manager=profile.posts
+    def get_profile(self):
+        if not hasattr(self, 'profile'):
+            self.profile = get_object_or_404(
+                User,
+                username=self.kwargs.get('username')
             )
+        return self.profile
+
+    def get_queryset(self):
+        profile = self.get_profile()
+        return get_posts_queryset(
+            manager=profile.posts,
+            apply_filters=self.request.user != profile
+        )
 
-        paginator = Paginator(posts_list, POSTS_PER_PAGE)
-        page_number = request.GET.get('page')
-        page_obj = paginator.get_page(page_number)
+    def get_count_key(self):
+        # Автор видит в своём профиле и неопубликованные посты.
+        own = self.request.user == self.get_profile()
+        return f'{super().get_count_key()}:{own}'
 
-        return render(request, 'blog/profile.html',
-                      {'profile': profile, 'page_obj': page_obj})
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['profile'] = self.get_profile()
+        return context
 
 
 class AddCommentView(LoginRequiredMixin, CreateView):
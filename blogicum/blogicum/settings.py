@@ -13,6 +13,53 @@ import os
 from pathlib import Path
 
 POSTS_PER_PAGE = 10
+COMMENTS_PER_PAGE = 50
+# Постраничная навигация по курсору (pub_date, id) вместо номеров страниц.
+FEED_CURSOR_PAGINATION = False
+# Число публикаций в ленте кэшируется на FEED_COUNT_CACHE_TIMEOUT секунд;
+# сверх FEED_COUNT_LIMIT объектов точное число не считается.
+FEED_COUNT_CACHE_TIMEOUT = 60
+FEED_COUNT_LIMIT = 10000
+# Страницы для анонимных посетителей сбрасываются при изменении данных
+# и при выходе отложенных публикаций (команда publish_scheduled).
+ANONYMOUS_PAGE_CACHE_TIMEOUT = 60 * 10
+# Как часто publish_scheduled --loop проверяет отложенные публикации.
+PUBLISH_SCHEDULED_INTERVAL = 30
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+# Отдавать ленту, категории и профиль потоком: шапка страницы уходит
+# сразу, карточки — по мере рендеринга. Такие страницы не кэшируются.
+STREAM_FEED_PAGES = False
+# Очередь писем EmailOutbox разбирает команда send_outbox: пачками по
+# OUTBOX_BATCH_SIZE, с паузой OUTBOX_RETRY_DELAY * 2 ** (попытка - 1)
+# секунд после ошибки.
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_DELAY = 60
+OUTBOX_INTERVAL = 10
+# Уведомления о новых публикациях: 'instant' — письмо на каждую,
+# 'digest' — одна сводка на получателя раз в DIGEST_WINDOW секунд
+# (команда send_digest). Получатели задаются в категории, по умолчанию —
+# NOTIFICATION_RECIPIENTS.
+POST_NOTIFICATIONS = 'instant'
+DIGEST_WINDOW = 60 * 60
+NOTIFICATION_RECIPIENTS = ['badger@badger.com']
+# Медиафайлы отдаёт blog.media.serve_media. Если MEDIA_ACCEL равно
+# 'x-accel-redirect' (nginx) или 'x-sendfile' (Apache), тело файла отдаёт
+# веб-сервер; для nginx внутренний location задаётся MEDIA_ACCEL_PREFIX.
+MEDIA_ACCEL = None
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+MEDIA_MAX_AGE = 60 * 60
+# Загруженные изображения уменьшаются до IMAGE_MAX_SIDE пикселей по
+# длинной стороне и пережимаются с качеством IMAGE_QUALITY.
+IMAGE_MAX_SIDE = 2560
+IMAGE_QUALITY = 85
+# Изображение можно загрузить частями по UPLOAD_CHUNK_SIZE байт и
+# продолжить после обрыва (blog.uploads). Части копятся в
+# UPLOAD_STAGING_ROOT; брошенные загрузки старше UPLOAD_EXPIRY секунд
+# удаляет команда gc_media.
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+UPLOAD_MAX_SIZE = 50 * 1024 * 1024
+UPLOAD_EXPIRY = 60 * 60 * 24
 TITLE_MAX_LENGTH = 256
 SERVICE_EMAIL = 'info@badger.com'
 LOGIN_URL = 'login'
@@ -73,6 +120,26 @@ TEMPLATES_DIR = BASE_DIR / 'templates'
 
 MEDIA_URL = 'media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media/')
+UPLOAD_STAGING_ROOT = os.path.join(BASE_DIR, 'uploads/')
+
+# Поколения blog.cache сбрасывают кэш страниц, категорий и подсказок во
+# всех рабочих процессах, только если кэш общий. В продакшене задайте адрес
+# memcached в BLOGICUM_CACHE_LOCATION; LocMemCache у каждого процесса свой
+# и годится только для разработки и тестов (см. проверку blog.W001).
+CACHE_LOCATION = os.environ.get('BLOGICUM_CACHE_LOCATION')
+if CACHE_LOCATION:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': CACHE_LOCATION,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
 
 TEMPLATES = [
     {
@@ -0,0 +1,57 @@
+// Подсказки для полей AutocompleteWidget: выбранный id пишется в скрытое
+// поле формы, название остаётся в текстовом.
+(function () {
+  const DELAY = 200;
+
+  function setup(input) {
+    const target = document.getElementById(input.dataset.autocompleteTarget);
+    const list = document.createElement('div');
+    list.className = 'list-group position-absolute w-100';
+    list.style.zIndex = 1000;
+    input.parentNode.style.position = 'relative';
+    input.insertAdjacentElement('afterend', list);
+    let timer = null;
+
+    function show(results) {
+      list.replaceChildren();
+      results.forEach(function (item) {
+        const option = document.createElement('button');
+        option.type = 'button';
+        option.className = 'list-group-item list-group-item-action';
+        option.textContent = item.text;
+        option.addEventListener('click', function () {
+          input.value = item.text;
+          target.value = item.id;
+          list.replaceChildren();
+        });
+        list.appendChild(option);
+      });
+    }
+
+    input.addEventListener('input', function () {
+      target.value = '';
+      clearTimeout(timer);
+      const query = input.value.trim();
+      if (!query) {
+        show([]);
+        return;
+      }
+      timer = setTimeout(function () {
+        const url = input.dataset.autocompleteUrl +
+          '?q=' + encodeURIComponent(query);
+        fetch(url, {credentials: 'same-origin'})
+          .then(function (response) { return response.json(); })
+          .then(function (data) { show(data.results); })
+          .catch(function () { show([]); });
+      }, DELAY);
+    });
+
+    input.addEventListener('blur', function () {
+      setTimeout(function () { list.replaceChildren(); }, DELAY);
+    });
+  }
+
+  document.addEventListener('DOMContentLoaded', function () {
+    document.querySelectorAll('[data-autocomplete-url]').forEach(setup);
+  });
+})();
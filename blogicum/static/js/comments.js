@@ -0,0 +1,22 @@
+// Догружает следующую порцию комментариев без перезагрузки страницы.
+document.addEventListener('click', function (event) {
+  const link = event.target.closest('[data-comments-url]');
+  if (!link) {
+    return;
+  }
+  event.preventDefault();
+  fetch(link.dataset.commentsUrl, {credentials: 'same-origin'})
+    .then(function (response) {
+      if (!response.ok) {
+        throw new Error(response.statusText);
+      }
+      return response.text();
+    })
+    .then(function (html) {
+      link.insertAdjacentHTML('beforebegin', html);
+      link.remove();
+    })
+    .catch(function () {
+      window.location.href = link.href;
+    });
+});
@@ -0,0 +1,123 @@
+// Загрузка изображения по частям: после обрыва связи передача продолжается
+// с принятого сервером смещения. Готовая загрузка передаётся форме через
+// скрытое поле upload_token, а сам файл из формы убирается.
+(function () {
+  const RETRIES = 5;
+  const RETRY_DELAY = 2000;
+
+  function sleep(ms) {
+    return new Promise(function (resolve) { setTimeout(resolve, ms); });
+  }
+
+  function toHex(buffer) {
+    return Array.from(new Uint8Array(buffer), function (byte) {
+      return byte.toString(16).padStart(2, '0');
+    }).join('');
+  }
+
+  async function request(url, options, csrfToken) {
+    const response = await fetch(url, Object.assign({
+      credentials: 'same-origin',
+    }, options, {
+      headers: Object.assign({'X-CSRFToken': csrfToken}, options.headers),
+    }));
+    const data = await response.json();
+    return {ok: response.ok, status: response.status, data: data};
+  }
+
+  async function upload(file, url, csrfToken, progress) {
+    const digest = await crypto.subtle.digest(
+      'SHA-256', await file.arrayBuffer()
+    );
+    const form = new FormData();
+    form.append('filename', file.name);
+    form.append('size', file.size);
+    form.append('sha256', toHex(digest));
+    let state = (await request(url, {method: 'POST', body: form}, csrfToken));
+    if (!state.ok) {
+      throw new Error(state.data.error);
+    }
+    state = state.data;
+    const chunkUrl = url + state.token + '/';
+    let failures = 0;
+    while (!state.complete) {
+      progress(state.offset / state.size);
+      const chunk = file.slice(state.offset, state.offset + state.chunk_size);
+      let result;
+      try {
+        result = await request(chunkUrl, {
+          method: 'PUT',
+          body: chunk,
+          headers: {'Upload-Offset': String(state.offset)},
+        }, csrfToken);
+      } catch (error) {
+        // Связь оборвалась: узнаём, сколько байт сервер успел принять.
+        if (++failures > RETRIES) {
+          throw error;
+        }
+        await sleep(RETRY_DELAY * failures);
+        try {
+          result = await request(chunkUrl, {method: 'GET'}, csrfToken);
+        } catch (ignored) {
+          continue;
+        }
+      }
+      if (!result.ok && result.status !== 409) {
+        throw new Error(result.data.error);
+      }
+      state = Object.assign(state, result.data);
+      if (result.ok) {
+        failures = 0;
+      }
+    }
+    progress(1);
+    return state.token;
+  }
+
+  function setup(input) {
+    const form = input.form;
+    const tokenInput = form.querySelector(
+      'input[name="' + input.dataset.uploadToken + '"]'
+    );
+    const csrfToken = form.querySelector(
+      'input[name="csrfmiddlewaretoken"]'
+    ).value;
+    const status = document.createElement('div');
+    status.className = 'form-text';
+    input.insertAdjacentElement('afterend', status);
+    const submit = form.querySelector('[type="submit"]');
+
+    input.addEventListener('change', async function () {
+      const file = input.files[0];
+      tokenInput.value = '';
+      if (!file) {
+        return;
+      }
+      if (submit) {
+        submit.disabled = true;
+      }
+      try {
+        tokenInput.value = await upload(
+          file, input.dataset.uploadUrl, csrfToken,
+          function (share) {
+            status.textContent = 'Загружено ' + Math.floor(share * 100) + '%';
+          }
+        );
+        // Файл уже на сервере: форма отправит только токен.
+        input.value = '';
+      } catch (error) {
+        // Файл останется в форме и уйдёт обычным способом.
+        status.textContent = 'Не удалось загрузить по частям: ' +
+          error.message;
+      } finally {
+        if (submit) {
+          submit.disabled = false;
+        }
+      }
+    });
+  }
+
+  document.addEventListener('DOMContentLoaded', function () {
+    document.querySelectorAll('input[data-upload-url]').forEach(setup);
+  });
+})();
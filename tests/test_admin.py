@@ -0,0 +1,71 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+# Запросы страницы списка: сессия, пользователь, фильтры, подсчёт и сами
+# записи. Число не должно зависеть от количества записей.
+MAX_CHANGELIST_QUERIES = 12
+
+
+def changelist_queries(admin_client, url):
+    # Без кэша: список самых частых значений фильтров тоже считается.
+    cache.clear()
+    with CaptureQueriesContext(connection) as context:
+        response = admin_client.get(url)
+    assert response.status_code == 200
+    return len(context.captured_queries)
+
+
+def create(mixer, model, count):
+    if model == 'blog.Post':
+        # Местоположение необязательно, и mixer его не заполняет.
+        return mixer.cycle(count).blend(model, location=(
+            mixer.blend('blog.Location') for _ in range(count)
+        ))
+    return mixer.cycle(count).blend(model)
+
+
+@pytest.mark.parametrize('model, url', [
+    ('blog.Post', '/admin/blog/post/'),
+    ('blog.Comment', '/admin/blog/comment/'),
+])
+def test_changelist_query_count(admin_client, mixer, model, url):
+    # У каждой записи свои автор, категория, местоположение и публикация.
+    create(mixer, model, 3)
+    few = changelist_queries(admin_client, url)
+    create(mixer, model, 20)
+    many = changelist_queries(admin_client, url)
+    assert few == many <= MAX_CHANGELIST_QUERIES, (
+        f'Убедитесь, что число запросов страницы `{url}` в админке не '
+        f'растёт с числом записей: {few} и {many} запросов.'
+    )
+
+
+def test_post_changelist_filters(admin_client, mixer, monkeypatch):
+    from blog import admin
+
+    monkeypatch.setattr(admin, 'ADMIN_FILTER_LIMIT', 2)
+    popular, other = mixer.cycle(2).blend('blog.Location')
+    mixer.cycle(3).blend('blog.Post', location=popular)
+    mixer.cycle(2).blend('blog.Post', location=other)
+    rare = mixer.blend('blog.Location')
+    mixer.blend('blog.Post', location=rare)
+
+    choices = admin_client.get('/admin/blog/post/').context['cl'].filter_specs
+    location_filter = next(
+        spec for spec in choices if spec.field_path == 'location'
+    )
+    assert [pk for pk, _ in location_filter.lookup_choices] == [
+        popular.pk, other.pk
+    ], (
+        'Убедитесь, что фильтр по местоположению показывает только самые '
+        'частые значения.'
+    )
+
+    response = admin_client.get(
+        f'/admin/blog/post/?location__id__exact={rare.pk}'
+    )
+    assert response.context['cl'].result_count == 1
@@ -0,0 +1,81 @@
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+
+def suggest(client, kind, query):
+    response = client.get(f'/autocomplete/{kind}/', {'q': query})
+    assert response.status_code == 200
+    return [item['text'] for item in response.json()['results']]
+
+
+def test_autocomplete_matches_word_prefix(user_client, mixer):
+    mixer.blend('blog.Location', name='Красная площадь')
+    mixer.blend('blog.Location', name='Озеро Байкал')
+    assert suggest(user_client, 'location', 'КРАС') == ['Красная площадь'], (
+        'Убедитесь, что подсказки ищут название по началу без учёта '
+        'регистра.'
+    )
+    assert suggest(user_client, 'location', 'байк') == ['Озеро Байкал'], (
+        'Убедитесь, что подсказки ищут по началу любого слова названия.'
+    )
+    assert suggest(user_client, 'location', '') == []
+
+
+def test_autocomplete_follows_changes(
+        user_client, mixer, user, django_capture_on_commit_callbacks,
+        django_assert_num_queries
+):
+    location = mixer.blend('blog.Location', name='Ёлкино')
+    assert suggest(user_client, 'location', 'елк') == ['Ёлкино']
+
+    with django_capture_on_commit_callbacks(execute=True):
+        location.name = 'Сосновка'
+        location.save()
+    # На каждый запрос — только сессия и пользователь.
+    with django_assert_num_queries(4):
+        assert suggest(user_client, 'location', 'елк') == []
+        assert suggest(user_client, 'location', 'сосн') == ['Сосновка'], (
+            'Убедитесь, что индекс подсказок обновляется при изменении '
+            'местоположения без повторной загрузки из базы.'
+        )
+
+    location.delete()
+    assert suggest(user_client, 'location', 'сосн') == []
+
+    user.username = 'badger_writer'
+    user.save()
+    assert suggest(user_client, 'user', 'badger') == ['badger_writer']
+
+
+def test_autocomplete_unknown_kind(user_client):
+    response = user_client.get('/autocomplete/post/', {'q': 'a'})
+    assert response.status_code == 404
+
+
+def test_autocomplete_hides_unpublished(client, user_client, mixer):
+    mixer.blend('blog.Category', title='Черновики', is_published=False)
+    location = mixer.blend('blog.Location', name='Тайное место')
+    response = client.get('/autocomplete/location/', {'q': 'тай'})
+    assert response.status_code == 302, (
+        'Убедитесь, что подсказки доступны только авторизованным '
+        'пользователям.'
+    )
+
+    assert suggest(user_client, 'category', 'черн') == [], (
+        'Убедитесь, что подсказки не показывают снятые с публикации '
+        'категории и местоположения.'
+    )
+    location.is_published = False
+    location.save()
+    assert suggest(user_client, 'location', 'тай') == []
+
+
+def test_post_form_skips_location_list(user_client, mixer):
+    locations = mixer.cycle(5).blend('blog.Location')
+    content = user_client.get('/posts/create/').content.decode()
+    assert '/autocomplete/location/' in content
+    assert not any(location.name in content for location in locations), (
+        'Убедитесь, что форма публикации не выводит список всех '
+        'местоположений.'
+    )
@@ -0,0 +1,16 @@
+import pytest
+
+
+@pytest.mark.parametrize('backend, warned', [
+    ('django.core.cache.backends.locmem.LocMemCache', True),
+    ('django.core.cache.backends.memcached.PyMemcacheCache', False),
+])
+def test_process_local_cache_warning(settings, backend, warned):
+    from blog.checks import check_shared_cache
+
+    settings.CACHES = {'default': {'BACKEND': backend}}
+    ids = [message.id for message in check_shared_cache()]
+    assert (ids == ['blog.W001']) is warned, (
+        'Убедитесь, что при `DEBUG = False` проверка предупреждает о кэше, '
+        'который не общий для рабочих процессов.'
+    )
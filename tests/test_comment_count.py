@@ -0,0 +1,102 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_comment_count_follows_comments(mixer, post_with_published_location):
+    post = post_with_published_location
+    comments = mixer.cycle(3).blend(
+        'blog.Comment', post=post, is_published=True
+    )
+    post.refresh_from_db()
+    assert post.comment_count == 3, (
+        'Убедитесь, что счётчик комментариев публикации увеличивается при '
+        'добавлении комментария.'
+    )
+
+    comments[0].is_published = False
+    comments[0].save()
+    comments[1].delete()
+    post.refresh_from_db()
+    assert post.comment_count == 1, (
+        'Убедитесь, что счётчик комментариев публикации учитывает снятие '
+        'комментария с публикации и его удаление.'
+    )
+
+    comments[0].is_published = True
+    comments[0].save()
+    post.refresh_from_db()
+    assert post.comment_count == 2
+
+
+def test_rebuild_comment_count(
+        client, mixer, post_with_published_location
+):
+    post = post_with_published_location
+    mixer.cycle(2).blend('blog.Comment', post=post, is_published=True)
+    type(post).objects.update(comment_count=0)
+    # Страница ленты и карточка публикации попадают в кэш.
+    assert 'Комментарии (0)' in client.get('/').content.decode()
+
+    call_command('rebuild_comment_count', stdout=StringIO())
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        'Убедитесь, что команда `rebuild_comment_count` пересчитывает '
+        'счётчики комментариев.'
+    )
+    assert 'Комментарии (2)' in client.get('/').content.decode(), (
+        'Убедитесь, что после `rebuild_comment_count` карточка публикации '
+        'показывает исправленный счётчик.'
+    )
+
+
+def test_feed_query_has_no_group_by(client, post_with_published_location):
+    with CaptureQueriesContext(connection) as captured:
+        client.get('/')
+    assert not any(
+        'GROUP BY' in query['sql'] or 'blog_comment' in query['sql']
+        for query in captured.captured_queries
+    ), (
+        'Убедитесь, что лента публикаций читает счётчик комментариев из '
+        'публикации и не обращается к таблице комментариев.'
+    )
+
+
+def test_detail_lists_counted_comments(
+        client, mixer, post_with_published_location
+):
+    post = post_with_published_location
+    shown = mixer.blend(
+        'blog.Comment', post=post, is_published=True, text='Видимый'
+    )
+    mixer.blend('blog.Comment', post=post, is_published=False, text='Скрытый')
+    comments = client.get(f'/posts/{post.id}/').context['comments']
+    post.refresh_from_db()
+    assert list(comments) == [shown] and post.comment_count == 1, (
+        'Убедитесь, что страница публикации выводит те же комментарии, '
+        'которые учитывает счётчик.'
+    )
+
+
+def delete_post_queries(mixer, comment_count):
+    post = mixer.blend('blog.Post')
+    mixer.cycle(comment_count).blend(
+        'blog.Comment', post=post, is_published=True
+    )
+    with CaptureQueriesContext(connection) as context:
+        post.delete()
+    return len(context.captured_queries)
+
+
+def test_post_delete_query_count(mixer):
+    few = delete_post_queries(mixer, 2)
+    many = delete_post_queries(mixer, 50)
+    assert few == many, (
+        'Убедитесь, что при удалении публикации комментарии не обновляют '
+        f'счётчик и кэш по одному: {few} и {many} запросов.'
+    )
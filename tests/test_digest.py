@@ -0,0 +1,56 @@
+from io import StringIO
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+def create_post(client, category, title):
+    response = client.post('/posts/create/', {
+        'title': title,
+        'text': 'Текст публикации',
+        'pub_date': timezone.now().strftime('%Y-%m-%dT%H:%M'),
+        'category': category.id,
+        'is_published': True,
+    })
+    assert response.status_code == 302
+
+
+def test_digest_groups_posts_by_recipient(
+        user_client, mixer, published_category, monkeypatch
+):
+    from blog import notifications
+    from blog.models import EmailOutbox
+
+    monkeypatch.setattr(notifications, 'POST_NOTIFICATIONS', 'digest')
+    published_category.notification_recipients = ''
+    published_category.save()
+    travel = mixer.blend(
+        'blog.Category',
+        is_published=True,
+        notification_recipients='travel@badger.com, badger@badger.com',
+    )
+    create_post(user_client, published_category, 'Первая публикация')
+    create_post(user_client, published_category, 'Вторая публикация')
+    create_post(user_client, travel, 'Путевые заметки')
+    assert not EmailOutbox.objects.exists(), (
+        'Убедитесь, что в режиме сводки письма не ставятся в очередь на '
+        'каждую публикацию.'
+    )
+
+    call_command('send_digest', stdout=StringIO())
+    call_command('send_digest', stdout=StringIO())
+    call_command('send_outbox', stdout=StringIO())
+    bodies = {message.to[0]: message.body for message in mail.outbox}
+    assert sorted(bodies) == ['badger@badger.com', 'travel@badger.com'], (
+        'Убедитесь, что каждый получатель получает одну сводку, а адреса '
+        'берутся из категории публикации.'
+    )
+    assert all(
+        title in bodies['badger@badger.com']
+        for title in ('Первая', 'Вторая', 'Путевые')
+    )
+    assert 'Первая' not in bodies['travel@badger.com']
@@ -0,0 +1,204 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_post_excerpt(mixer, user, published_category):
+    post = mixer.blend(
+        'blog.Post',
+        author=user,
+        category=published_category,
+        text=' '.join(f'слово{i}' for i in range(30)),
+    )
+    assert post.excerpt == ' '.join(f'слово{i}' for i in range(10)) + ' …', (
+        'Убедитесь, что при сохранении публикации в поле `excerpt` '
+        'записываются первые 10 слов текста.'
+    )
+
+
+def test_feed_skips_heavy_columns(client, post_with_published_location):
+    with CaptureQueriesContext(connection) as captured:
+        response = client.get('/')
+    assert post_with_published_location.excerpt in response.content.decode()
+    feed_sql = ' '.join(query['sql'] for query in captured.captured_queries)
+    assert '"blog_post"."text"' not in feed_sql, (
+        'Убедитесь, что лента публикаций не загружает полный текст постов.'
+    )
+    assert '"auth_user"."password"' not in feed_sql, (
+        'Убедитесь, что лента публикаций загружает из `auth_user` только '
+        'поля, которые выводятся в карточке публикации.'
+    )
+
+
+@pytest.mark.parametrize('url_name', ['index', 'category', 'detail'])
+def test_anonymous_page_cache(
+        client, mixer, post_with_published_location,
+        django_assert_num_queries, url_name
+):
+    post = post_with_published_location
+    url = {
+        'index': '/',
+        'category': f'/category/{post.category.slug}/',
+        'detail': f'/posts/{post.id}/',
+    }[url_name]
+
+    first = client.get(url)
+    with django_assert_num_queries(0):
+        cached = client.get(url)
+    assert cached.content == first.content, (
+        'Убедитесь, что анонимные посетители получают страницу из кэша.'
+    )
+
+    mixer.blend('blog.Comment', post=post, is_published=True)
+    assert client.get(url).content != first.content, (
+        'Убедитесь, что кэш страницы сбрасывается при добавлении '
+        'комментария к публикации.'
+    )
+
+    post.title = 'Новый заголовок публикации'
+    post.save()
+    assert post.title in client.get(url).content.decode(), (
+        'Убедитесь, что кэш страницы сбрасывается при изменении публикации.'
+    )
+
+    post.category.title = 'Новое название категории'
+    post.category.save()
+    assert post.category.title in client.get(url).content.decode(), (
+        'Убедитесь, что кэш страницы сбрасывается при изменении категории.'
+    )
+
+
+def test_page_cache_skips_authenticated(
+        user_client, post_with_published_location
+):
+    user_client.get('/')
+    response = user_client.get('/')
+    assert response.context is not None, (
+        'Убедитесь, что страницы для авторизованных пользователей не '
+        'берутся из кэша.'
+    )
+
+
+def test_post_card_fragment_cache(
+        user_client, mixer, post_with_published_location, monkeypatch
+):
+    from django.core.cache import cache
+
+    post = post_with_published_location
+    user_client.get('/')
+    get_many_calls = []
+    get_many = cache.get_many
+
+    def spy(keys, *args, **kwargs):
+        keys = list(keys)
+        get_many_calls.append(keys)
+        return get_many(keys, *args, **kwargs)
+
+    monkeypatch.setattr(cache, 'get_many', spy)
+    assert post.title in user_client.get('/').content.decode()
+    card_calls = [
+        keys for keys in get_many_calls
+        if any('post_card' in key for key in keys)
+    ]
+    assert len(card_calls) == 1, (
+        'Убедитесь, что карточки страницы читаются из кэша одним '
+        'запросом `get_many`.'
+    )
+
+    post.location.name = 'Новое место'
+    post.location.save()
+    assert 'Новое место' in user_client.get('/').content.decode(), (
+        'Убедитесь, что карточка публикации перерисовывается после '
+        'изменения её местоположения.'
+    )
+    mixer.blend('blog.Comment', post=post, is_published=True)
+    assert 'Комментарии (1)' in user_client.get('/').content.decode()
+
+
+def test_publish_scheduled(client, mixer, user, published_category):
+    from datetime import timedelta
+    from io import StringIO
+
+    from django.core.management import call_command
+    from django.utils import timezone
+
+    post = mixer.blend(
+        'blog.Post',
+        author=user,
+        is_published=True,
+        category=published_category,
+        pub_date=timezone.now() + timedelta(days=1),
+    )
+    assert not post.is_visible
+    assert post.title not in client.get('/').content.decode()
+
+    type(post).objects.filter(pk=post.pk).update(
+        pub_date=timezone.now() - timedelta(minutes=1)
+    )
+    call_command('publish_scheduled', stdout=StringIO())
+    post.refresh_from_db()
+    assert post.is_visible, (
+        'Убедитесь, что команда `publish_scheduled` открывает публикации, '
+        'дата которых наступила.'
+    )
+    assert post.title in client.get('/').content.decode(), (
+        'Убедитесь, что после выхода отложенной публикации кэш ленты '
+        'сбрасывается.'
+    )
+
+
+def test_category_toggle_updates_visibility(
+        client, post_with_published_location
+):
+    post = post_with_published_location
+    category = post.category
+    category.is_published = False
+    category.save()
+    post.refresh_from_db()
+    assert not post.is_visible, (
+        'Убедитесь, что при снятии категории с публикации её посты '
+        'скрываются из ленты.'
+    )
+    assert client.get(f'/posts/{post.id}/').status_code == 404
+
+    category.is_published = True
+    category.save()
+    post.refresh_from_db()
+    assert post.is_visible
+    response = client.get('/')
+    assert post.title in response.content.decode()
+    feed_query = str(response.context['paginator'].object_list.query)
+    assert '"blog_category"."is_published" AND' not in feed_query, (
+        'Убедитесь, что лента фильтрует публикации по полю `is_visible`.'
+    )
+
+
+@pytest.mark.parametrize('url_name', ['index', 'category', 'profile'])
+def test_streaming_feed(client, post_with_published_location, url_name):
+    from django.core.cache import cache
+    from django.test import override_settings
+
+    post = post_with_published_location
+    url = {
+        'index': '/',
+        'category': f'/category/{post.category.slug}/',
+        'profile': f'/profile/{post.author.username}/',
+    }[url_name]
+    expected = client.get(url).content.decode()
+    cache.clear()
+
+    with override_settings(STREAM_FEED_PAGES=True):
+        for _ in range(2):
+            response = client.get(url)
+            assert response.streaming, (
+                'Убедитесь, что при включённой настройке `STREAM_FEED_PAGES` '
+                'страница отдаётся потоком и не берётся из кэша.'
+            )
+            chunks = [chunk.decode() for chunk in response.streaming_content]
+    assert '<head>' in chunks[0] and post.title not in chunks[0], (
+        'Убедитесь, что начало страницы отправляется до карточек публикаций.'
+    )
+    assert post.title in ''.join(chunks)
+    assert ''.join(chunks).count('<article') == expected.count('<article')
@@ -0,0 +1,217 @@
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from PIL import Image
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def post_with_image(media_root, post_with_published_location):
+    post = post_with_published_location
+    content = BytesIO()
+    Image.new('RGB', (2000, 1000), 'red').save(content, 'JPEG')
+    post.image.save('photo.jpg', ContentFile(content.getvalue()))
+    return post
+
+
+def test_card_uses_renditions(user_client, post_with_image):
+    content = user_client.get('/').content.decode()
+    name = post_with_image.image.name
+    assert f'/media/renditions/v1/card/{name}.webp 1x' in content, (
+        'Убедитесь, что карточка публикации выводит уменьшенное '
+        'изображение в формате WebP.'
+    )
+    assert f'src="{post_with_image.image.url}"' not in content, (
+        'Убедитесь, что карточка публикации не загружает оригинал '
+        'изображения.'
+    )
+    assert 'width="640" height="360" loading="lazy"' in content
+
+    detail = user_client.get(f'/posts/{post_with_image.id}/')
+    assert 'width="1200" height="600"' in detail.content.decode()
+
+
+def test_rendition_generated_on_request(client, post_with_image, media_root):
+    url = f'/media/renditions/v1/card2x/{post_with_image.image.name}.webp'
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'image/webp'
+    image = Image.open(BytesIO(b''.join(response.streaming_content)))
+    assert image.size == (1280, 720), (
+        'Убедитесь, что производное изображение создаётся при первом '
+        'запросе и имеет размер рендишна.'
+    )
+    assert (media_root / url.removeprefix('/media/')).exists()
+    assert 'immutable' in response['Cache-Control'], (
+        'Убедитесь, что производные изображения оригиналов с хэшем в имени '
+        'кэшируются как `immutable`.'
+    )
+
+    for bad_url in (
+        '/media/renditions/v1/card/post_images/../../secret.jpg.webp',
+        '/media/renditions/v1/huge/' + post_with_image.image.name + '.webp',
+        '/media/renditions/v1/card/post_images/missing.jpg.webp',
+    ):
+        assert client.get(bad_url).status_code == 404
+
+
+def test_generate_thumbnails(post_with_image, media_root):
+    call_command('generate_thumbnails', stdout=StringIO())
+    renditions = sorted(
+        path.relative_to(media_root / 'renditions' / 'v1').as_posix()
+        for path in (media_root / 'renditions').rglob('*.*')
+    )
+    name = post_with_image.image.name
+    assert renditions == sorted(
+        f'{rendition}/{name}.{image_format}'
+        for rendition in ('card', 'card2x', 'detail')
+        for image_format in ('jpeg', 'webp')
+    ), (
+        'Убедитесь, что команда `generate_thumbnails` создаёт все '
+        'производные изображения для недавно изменённых публикаций.'
+    )
+
+
+def test_upload_is_normalized(
+        media_root, mixer, user, published_category, monkeypatch
+):
+    from django.core.files.uploadedfile import SimpleUploadedFile
+
+    from blog import images
+
+    monkeypatch.setattr(images, 'IMAGE_MAX_SIDE', 1000)
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation: повернуть на 90°.
+    exif[0x010F] = 'Camera'
+    content = BytesIO()
+    Image.new('RGB', (4000, 1000), 'blue').save(content, 'JPEG', exif=exif)
+    post = mixer.blend(
+        'blog.Post',
+        author=user,
+        category=published_category,
+        image=SimpleUploadedFile('camera.jpeg', content.getvalue()),
+    )
+    assert post.image_size == [250, 1000], (
+        'Убедитесь, что загруженное изображение поворачивается по EXIF, '
+        'уменьшается до `IMAGE_MAX_SIDE` и его размер сохраняется в '
+        'публикации.'
+    )
+    with post.image.open() as stored, Image.open(stored) as image:
+        assert image.size == (250, 1000)
+        assert not image.getexif(), (
+            'Убедитесь, что из загруженного изображения удаляются '
+            'метаданные.'
+        )
+
+
+def test_images_are_content_addressed(
+        media_root, mixer, user, published_category,
+        django_capture_on_commit_callbacks
+):
+    from django.core.files.uploadedfile import SimpleUploadedFile
+
+    from blog.models import StoredFile
+    from blog.storage import is_hashed_name
+
+    content = BytesIO()
+    Image.new('RGB', (300, 200), 'green').save(content, 'JPEG')
+    posts = [
+        mixer.blend(
+            'blog.Post',
+            author=user,
+            category=published_category,
+            image=SimpleUploadedFile(f'{name}.jpg', content.getvalue()),
+        )
+        for name in ('first', 'second')
+    ]
+    name = posts[0].image.name
+    assert is_hashed_name(name) and posts[1].image.name == name, (
+        'Убедитесь, что одинаковые изображения сохраняются под одним '
+        'именем, полученным из хэша содержимого.'
+    )
+    assert StoredFile.objects.get(name=name).references == 2
+
+    with django_capture_on_commit_callbacks(execute=True):
+        posts[0].delete()
+    assert (media_root / name).exists(), (
+        'Убедитесь, что файл не удаляется, пока на него ссылаются другие '
+        'публикации.'
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        posts[1].delete()
+    assert not (media_root / name).exists()
+    assert not StoredFile.objects.filter(name=name).exists()
+
+
+def test_released_image_reused_before_commit(
+        post_with_image, django_capture_on_commit_callbacks, media_root
+):
+    from blog.models import StoredFile
+
+    name = post_with_image.image.name
+    with django_capture_on_commit_callbacks(execute=True):
+        post_with_image.delete()
+        # Такой же файл загрузили в другой публикации до коммита.
+        StoredFile.acquire(name)
+    assert (media_root / name).exists(), (
+        'Убедитесь, что файл не удаляется после коммита, если на него '
+        'снова появилась ссылка.'
+    )
+
+
+def test_gc_media(post_with_image, media_root, tmp_path_factory):
+    import os
+
+    from blog.images import generate_renditions
+
+    kept_name = post_with_image.image.name
+    generate_renditions(kept_name)
+    rendition = media_root / 'renditions' / 'v1' / 'card' / 'post_images'
+    orphans = {
+        media_root / 'post_images' / 'old.jpg',
+        rendition / 'old.jpg.webp',
+        media_root / 'renditions' / 'v0' / 'card' / f'{kept_name}.webp',
+        media_root / 'post_images' / '.upload-abc',
+    }
+    for path in orphans:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'old')
+    for path in media_root.rglob('*'):
+        os.utime(path, (0, 0))
+    fresh = media_root / 'post_images' / 'fresh.jpg'
+    fresh.write_bytes(b'fresh')
+    kept = {fresh} | {
+        path for path in media_root.rglob('*')
+        if kept_name in str(path) and 'v0' not in path.parts
+    }
+
+    output = StringIO()
+    call_command('gc_media', dry_run=True, min_age=60, stdout=output)
+    assert all(path.exists() for path in orphans)
+    assert 'post_images/old.jpg\n' in output.getvalue(), (
+        'Убедитесь, что `gc_media --dry-run` выводит список файлов и '
+        'ничего не удаляет.'
+    )
+
+    quarantine = tmp_path_factory.mktemp('quarantine')
+    call_command(
+        'gc_media', quarantine=str(quarantine), min_age=60,
+        chunk_size=2, stdout=StringIO()
+    )
+    assert not any(path.exists() for path in orphans), (
+        'Убедитесь, что `gc_media` убирает файлы без ссылок из публикаций, '
+        'их производные и брошенные временные файлы.'
+    )
+    assert all(path.exists() for path in kept), (
+        'Убедитесь, что `gc_media` не трогает используемые и свежие файлы.'
+    )
+    assert (quarantine / 'post_images' / 'old.jpg').read_bytes() == b'old'
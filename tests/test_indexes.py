@@ -0,0 +1,57 @@
+import pytest
+from django.db import connection
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != 'sqlite',
+        reason='EXPLAIN QUERY PLAN есть только в SQLite.'
+    ),
+]
+
+
+def query_plan(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return ' '.join(row[-1] for row in cursor.fetchall())
+
+
+def assert_uses_index(plan, index_name):
+    assert f'USING INDEX {index_name}' in plan, (
+        f'Убедитесь, что запрос использует индекс `{index_name}`. '
+        f'План запроса: {plan}'
+    )
+    assert 'TEMP B-TREE' not in plan, (
+        'Убедитесь, что сортировка запроса выполняется по индексу. '
+        f'План запроса: {plan}'
+    )
+
+
+def test_index_feed_uses_index():
+    from blog.views import get_posts_queryset
+
+    plan = query_plan(get_posts_queryset()[:10])
+    assert_uses_index(plan, 'post_visible_pub_date_idx')
+
+
+def test_category_feed_uses_index(published_category):
+    from blog.views import get_posts_queryset
+
+    plan = query_plan(get_posts_queryset(published_category.posts)[:10])
+    assert_uses_index(plan, 'post_visible_category_idx')
+
+
+def test_profile_feed_uses_index(user):
+    from blog.views import get_posts_queryset
+
+    for apply_filters in (True, False):
+        plan = query_plan(
+            get_posts_queryset(user.posts, apply_filters=apply_filters)[:10]
+        )
+        assert_uses_index(plan, 'post_author_pub_date_idx')
+
+
+def test_comments_use_index(post_with_published_location):
+    plan = query_plan(post_with_published_location.comment_set.all())
+    assert_uses_index(plan, 'comment_post_created_at_idx')
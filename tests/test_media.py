@@ -0,0 +1,101 @@
+import pytest
+from django.core.files.base import ContentFile
+
+pytestmark = [pytest.mark.django_db]
+
+CONTENT = bytes(range(256)) * 4
+
+
+@pytest.fixture
+def media_file(settings, tmp_path):
+    from blog.storage import post_image_storage
+
+    settings.MEDIA_ROOT = str(tmp_path)
+    return post_image_storage.save('post_images/file.jpg', ContentFile(CONTENT))
+
+
+def get_media(client, name, **headers):
+    return client.get(f'/media/{name}', **headers)
+
+
+def body(response):
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+def test_media_full_and_conditional(client, media_file):
+    response = get_media(client, media_file)
+    assert response.status_code == 200
+    assert body(response) == CONTENT
+    assert response['Accept-Ranges'] == 'bytes'
+    assert 'immutable' in response['Cache-Control'], (
+        'Убедитесь, что файлы с хэшем содержимого в имени отдаются с '
+        '`Cache-Control: immutable`.'
+    )
+
+    cached = get_media(
+        client, media_file, HTTP_IF_NONE_MATCH=response['ETag']
+    )
+    assert cached.status_code == 304, (
+        'Убедитесь, что при совпадении `If-None-Match` возвращается 304.'
+    )
+    cached = get_media(
+        client, media_file,
+        HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+    )
+    assert cached.status_code == 304
+
+
+@pytest.mark.parametrize('header, status, expected', [
+    ('bytes=0-9', 206, CONTENT[:10]),
+    ('bytes=1020-', 206, CONTENT[1020:]),
+    ('bytes=-5', 206, CONTENT[-5:]),
+    ('bytes=0-1,5-6', 200, CONTENT),
+    ('bytes=5000-', 416, b''),
+])
+def test_media_range(client, media_file, header, status, expected):
+    response = get_media(client, media_file, HTTP_RANGE=header)
+    assert response.status_code == status, (
+        f'Убедитесь, что на заголовок `Range: {header}` возвращается '
+        f'статус {status}.'
+    )
+    assert body(response) == expected
+    if status == 416:
+        assert response['Content-Range'] == f'bytes */{len(CONTENT)}'
+
+
+def test_media_if_range(client, media_file):
+    response = get_media(
+        client, media_file, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"old"'
+    )
+    assert response.status_code == 200, (
+        'Убедитесь, что при устаревшем `If-Range` файл отдаётся целиком.'
+    )
+
+
+def test_media_accel(client, media_file, monkeypatch):
+    from blog import media
+
+    monkeypatch.setattr(media, 'MEDIA_ACCEL', 'x-accel-redirect')
+    response = get_media(client, media_file)
+    assert response['X-Accel-Redirect'] == f'/protected-media/{media_file}'
+    assert response.content == b'', (
+        'Убедитесь, что при `MEDIA_ACCEL` тело файла отдаёт веб-сервер.'
+    )
+
+    monkeypatch.setattr(media, 'MEDIA_ACCEL', 'x-sendfile')
+    response = get_media(client, media_file)
+    assert response['X-Sendfile'].endswith(media_file)
+
+
+@pytest.mark.parametrize('name', [
+    '../settings.py',
+    'post_images/%2e%2e/%2e%2e/settings.py',
+    'post_images/missing.jpg',
+    'post_images/.upload-123',
+    'post_images',
+])
+def test_media_rejects_bad_paths(client, media_file, tmp_path, name):
+    (tmp_path / 'post_images' / '.upload-123').write_bytes(b'partial')
+    assert get_media(client, name).status_code == 404
@@ -0,0 +1,94 @@
+from io import StringIO
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def queued_mail(user_client, published_category):
+    from blog.models import EmailOutbox
+
+    response = user_client.post('/posts/create/', {
+        'title': 'Новая публикация',
+        'text': 'Текст публикации',
+        'pub_date': timezone.now().strftime('%Y-%m-%dT%H:%M'),
+        'category': published_category.id,
+        'is_published': True,
+    })
+    assert response.status_code == 302
+    assert not mail.outbox, (
+        'Убедитесь, что при создании публикации письмо не отправляется '
+        'во время запроса.'
+    )
+    return EmailOutbox.objects.get()
+
+
+def test_send_outbox(queued_mail):
+    call_command('send_outbox', stdout=StringIO())
+    assert [message.subject for message in mail.outbox] == [
+        'New post added - Новая публикация'
+    ], 'Убедитесь, что команда `send_outbox` отправляет письма из очереди.'
+    queued_mail.refresh_from_db()
+    assert queued_mail.sent_at is not None
+
+    call_command('send_outbox', stdout=StringIO())
+    assert len(mail.outbox) == 1, 'Письмо должно отправляться один раз.'
+
+
+def test_send_outbox_retries(queued_mail, monkeypatch):
+    def fail(self, messages):
+        raise ConnectionError('Сервер недоступен')
+
+    monkeypatch.setattr(EmailBackend, 'send_messages', fail)
+    call_command('send_outbox', stdout=StringIO())
+    queued_mail.refresh_from_db()
+    assert queued_mail.sent_at is None
+    assert queued_mail.attempts == 1
+    assert 'Сервер недоступен' in queued_mail.last_error
+    assert queued_mail.next_attempt_at > timezone.now(), (
+        'Убедитесь, что после ошибки отправка откладывается.'
+    )
+
+    monkeypatch.undo()
+    call_command('send_outbox', stdout=StringIO())
+    assert not mail.outbox, (
+        'Убедитесь, что повторная попытка выполняется только после паузы.'
+    )
+
+
+def test_send_outbox_connection_refused(queued_mail, monkeypatch):
+    def refuse(self):
+        raise ConnectionRefusedError('Соединение отклонено')
+
+    monkeypatch.setattr(EmailBackend, 'open', refuse)
+    call_command('send_outbox', stdout=StringIO())
+    queued_mail.refresh_from_db()
+    assert queued_mail.attempts == 1, (
+        'Убедитесь, что ошибка подключения к почтовому серверу '
+        'засчитывается как попытка отправки.'
+    )
+    assert 'Соединение отклонено' in queued_mail.last_error
+    assert queued_mail.next_attempt_at > timezone.now()
+
+
+def test_long_title_subject(user_client, published_category):
+    from blog.models import EmailOutbox
+
+    title = 'З' * 256
+    response = user_client.post('/posts/create/', {
+        'title': title,
+        'text': 'Текст публикации',
+        'pub_date': timezone.now().strftime('%Y-%m-%dT%H:%M'),
+        'category': published_category.id,
+        'is_published': True,
+    })
+    assert response.status_code == 302
+    assert EmailOutbox.objects.get().subject == f'New post added - {title}', (
+        'Убедитесь, что тема письма о публикации с заголовком предельной '
+        'длины сохраняется в очереди целиком.'
+    )
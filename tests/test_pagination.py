@@ -0,0 +1,171 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def feed_posts(mixer, user, published_category):
+    now = timezone.now()
+    # Часть публикаций с одинаковой датой — курсор должен учитывать id.
+    return mixer.cycle(N_PER_PAGE * 2 + 3).blend(
+        'blog.Post',
+        author=user,
+        is_published=True,
+        category=published_category,
+        pub_date=(now - timedelta(hours=i // 3) for i in range(100)),
+    )
+
+
+def collect_cursor_pages(client, url, cursor_attr):
+    pages = []
+    cursor = ''
+    while True:
+        response = client.get(url, {'cursor': cursor} if cursor else {})
+        assert response.status_code == 200
+        page_obj = response.context['page_obj']
+        pages.append([post.id for post in page_obj])
+        cursor = getattr(page_obj, cursor_attr)
+        if cursor is None:
+            return pages, page_obj
+        assert len(pages) <= N_PER_PAGE, (
+            'Убедитесь, что постраничная навигация по курсору завершается.'
+        )
+
+
+@override_settings(FEED_CURSOR_PAGINATION=True)
+def test_cursor_pagination(
+        user_client, feed_posts
+):
+    from blog.views import get_posts_queryset
+
+    expected = list(
+        get_posts_queryset().order_by('-pub_date', '-pk')
+        .values_list('id', flat=True)
+    )
+    pages, last_page = collect_cursor_pages(user_client, '/', 'next_cursor')
+    assert [post_id for page in pages for post_id in page] == expected, (
+        'Убедитесь, что при навигации по курсору каждая публикация главной '
+        'страницы выводится ровно один раз и в порядке убывания даты.'
+    )
+    assert all(len(page) == N_PER_PAGE for page in pages[:-1])
+
+    response = user_client.get('/', {'cursor': last_page.previous_cursor})
+    assert [post.id for post in response.context['page_obj']] == pages[-2], (
+        'Убедитесь, что ссылка на предыдущую страницу при навигации по '
+        'курсору возвращает предыдущую страницу.'
+    )
+
+
+@override_settings(FEED_CURSOR_PAGINATION=True)
+def test_cursor_pagination_skips_count(
+        user_client, feed_posts,
+        django_assert_max_num_queries
+):
+    with django_assert_max_num_queries(5) as captured:
+        response = user_client.get('/', {'cursor': 'broken-cursor'})
+    assert len(response.context['page_obj']) == N_PER_PAGE
+    assert not any(
+        'COUNT(*)' in query['sql'] for query in captured.captured_queries
+    ), 'Убедитесь, что навигация по курсору не выполняет COUNT(*).'
+
+
+def test_paginator_elides_page_range(user_client, feed_posts, monkeypatch):
+    from blog.mixins import PostsPaginationMixin
+
+    monkeypatch.setattr(PostsPaginationMixin, 'paginate_by', 1)
+    response = user_client.get('/', {'page': 12})
+    page_links = list(response.context['page_obj'].elided_page_range)
+    assert len(page_links) < len(feed_posts), (
+        'Убедитесь, что постраничная навигация выводит только номера '
+        'страниц рядом с текущей.'
+    )
+    content = response.content.decode()
+    assert '?page=1"' in content and f'?page={len(feed_posts)}"' in content
+    assert '?page=5"' not in content and '?page=10"' in content
+
+
+def test_paginator_caches_count(user_client, feed_posts):
+    def count_queries():
+        with CaptureQueriesContext(connection) as captured:
+            user_client.get('/', {'page': 2})
+        return [
+            query for query in captured.captured_queries
+            if 'COUNT(*)' in query['sql']
+        ]
+
+    assert count_queries(), 'Число публикаций должно считаться один раз.'
+    assert not count_queries(), (
+        'Убедитесь, что число публикаций в ленте кэшируется.'
+    )
+    feed_posts[0].save()
+    assert count_queries(), (
+        'Убедитесь, что кэш числа публикаций сбрасывается при изменении '
+        'публикаций.'
+    )
+
+
+def test_paginator_estimates_large_count(user_client, feed_posts,
+                                         monkeypatch):
+    from blog import paginators
+
+    monkeypatch.setattr(paginators, 'FEED_COUNT_LIMIT', N_PER_PAGE)
+    response = user_client.get('/', {'page': 3})
+    page_obj = response.context['page_obj']
+    assert page_obj.paginator.count_is_estimated
+    assert len(page_obj) == len(feed_posts) - 2 * N_PER_PAGE, (
+        'Убедитесь, что страницы за пределами оценки числа публикаций '
+        'остаются доступными.'
+    )
+    assert 'Последняя' not in response.content.decode()
+
+
+def test_comments_are_paginated(
+        client, mixer, post_with_published_location, monkeypatch
+):
+    from blog import views
+
+    monkeypatch.setattr(views, 'COMMENTS_PER_PAGE', 2)
+    post = post_with_published_location
+    comments = mixer.cycle(5).blend('blog.Comment', post=post)
+
+    response = client.get(f'/posts/{post.id}/')
+    page = response.context['comments']
+    assert [comment.id for comment in page] == [c.id for c in comments[:2]], (
+        'Убедитесь, что на странице публикации выводится первая порция '
+        'комментариев в порядке добавления.'
+    )
+
+    shown = [comment.id for comment in page]
+    while page.has_next():
+        response = client.get(
+            f'/posts/{post.id}/comments/', {'comments': page.next_cursor}
+        )
+        assert response.status_code == 200
+        assert '<html' not in response.content.decode(), (
+            'Убедитесь, что адрес порции комментариев возвращает только '
+            'разметку комментариев.'
+        )
+        page = response.context['comments']
+        shown.extend(comment.id for comment in page)
+    assert shown == [comment.id for comment in comments]
+
+
+def test_comments_fragment_hides_unpublished_post(
+        client, mixer, post_with_published_location
+):
+    post = post_with_published_location
+    post.is_published = False
+    post.save()
+    response = client.get(f'/posts/{post.id}/comments/')
+    assert response.status_code == 404, (
+        'Убедитесь, что комментарии к неопубликованной публикации '
+        'недоступны другим пользователям.'
+    )
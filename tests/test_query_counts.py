@@ -0,0 +1,77 @@
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.mark.parametrize('n_comments', [0, 1, 15])
+def test_post_detail_queries(
+        client, mixer, another_user, post_with_published_location,
+        django_assert_num_queries, n_comments
+):
+    post = post_with_published_location
+    mixer.cycle(n_comments).blend(
+        'blog.Comment', post=post, author=another_user
+    )
+    with django_assert_num_queries(2):
+        response = client.get(f'/posts/{post.id}/')
+    assert response.status_code == 200
+    assert response.content.decode().count(
+        f'@{another_user.username}'
+    ) == n_comments, (
+        'Убедитесь, что на странице публикации выводятся все комментарии.'
+    )
+
+
+@pytest.fixture
+def own_comment(mixer, user, post_with_published_location):
+    return mixer.blend(
+        'blog.Comment', post=post_with_published_location, author=user
+    )
+
+
+# Сессия, пользователь и сам объект; категорию и местоположение форма
+# выводит виджетом автодополнения, без списка вариантов из базы.
+@pytest.mark.parametrize('url, n_queries', [
+    ('/posts/{post_id}/edit/', 3),
+    ('/posts/{post_id}/delete/', 3),
+    ('/posts/{post_id}/edit_comment/{comment_id}/', 3),
+    ('/posts/{post_id}/delete_comment/{comment_id}/', 3),
+])
+def test_author_pages_fetch_object_once(
+        user_client, own_comment, django_assert_num_queries, url, n_queries
+):
+    url = url.format(post_id=own_comment.post_id, comment_id=own_comment.id)
+    user_client.get(url)
+    with django_assert_num_queries(n_queries):
+        response = user_client.get(url)
+    assert response.status_code == 200
+
+
+def test_category_page_resolves_category_from_memory(
+        user_client, post_with_published_location
+):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    url = f'/category/{post_with_published_location.category.slug}/'
+    user_client.get(url)
+    with CaptureQueriesContext(connection) as captured:
+        response = user_client.get(url)
+    assert response.context['category'].pk == (
+        post_with_published_location.category_id
+    )
+    assert not any(
+        'FROM "blog_category"' in query['sql']
+        for query in captured.captured_queries
+    ), 'Убедитесь, что категория страницы берётся из кэша процесса.'
+
+
+def test_category_cache_follows_changes(user_client, published_category):
+    url = f'/category/{published_category.slug}/'
+    assert user_client.get(url).status_code == 200
+    published_category.is_published = False
+    published_category.save()
+    assert user_client.get(url).status_code == 404, (
+        'Убедитесь, что кэш категорий обновляется после снятия категории '
+        'с публикации.'
+    )
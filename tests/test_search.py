@@ -0,0 +1,92 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != 'sqlite',
+        reason='Индекс FTS5 есть только в SQLite.'
+    ),
+]
+
+
+def search(client, query, **params):
+    response = client.get('/search/', {'q': query, **params})
+    assert response.status_code == 200
+    return response
+
+
+def found_ids(response):
+    return [post.id for post in response.context['results']]
+
+
+def test_search_finds_and_highlights(client, post_with_published_location):
+    post = post_with_published_location
+    post.text = 'Барсук <b>строит</b> норы в лесу'
+    post.save()
+
+    response = search(client, 'барсу')
+    assert found_ids(response) == [post.id], (
+        'Убедитесь, что поиск находит публикации по началу слова из текста.'
+    )
+    content = response.content.decode()
+    assert '<mark>Барсук</mark>' in content, (
+        'Убедитесь, что найденные слова выделяются во фрагменте текста.'
+    )
+    assert '&lt;b&gt;строит&lt;/b&gt;' in content, (
+        'Убедитесь, что фрагмент текста экранируется перед выделением.'
+    )
+
+
+def test_search_follows_changes(client, post_with_published_location):
+    post = post_with_published_location
+    post.category.title = 'Путешествия'
+    post.category.save()
+    assert found_ids(search(client, 'путешествия')) == [post.id], (
+        'Убедитесь, что индекс обновляется при изменении категории.'
+    )
+
+    post.is_published = False
+    post.save()
+    assert not found_ids(search(client, 'путешествия')), (
+        'Убедитесь, что поиск не выводит снятые с публикации посты.'
+    )
+
+    post.delete()
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT count(*) FROM blog_post_fts')
+        assert cursor.fetchone()[0] == 0
+
+
+def test_search_pages(client, mixer, user, published_category):
+    mixer.cycle(12).blend(
+        'blog.Post',
+        author=user,
+        is_published=True,
+        category=published_category,
+        text='Общее слово',
+    )
+    first = search(client, 'общее')
+    second = search(client, 'общее', page=2)
+    assert first.context['has_next'] and not second.context['has_next']
+    assert len(found_ids(first)) + len(found_ids(second)) == 12
+
+
+def test_rebuild_search_index(client, post_with_published_location):
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM blog_post_fts')
+    call_command('rebuild_search_index', stdout=StringIO())
+    assert found_ids(search(client, post_with_published_location.title)), (
+        'Убедитесь, что команда `rebuild_search_index` заполняет индекс.'
+    )
+
+
+def test_admin_search(admin_client, post_with_published_location):
+    post = post_with_published_location
+    for term in (post.title, post.author.username):
+        response = admin_client.get('/admin/blog/post/', {'q': term})
+        assert response.status_code == 200
+        assert list(response.context['cl'].result_list) == [post]
@@ -0,0 +1,112 @@
+import hashlib
+from io import BytesIO
+
+import pytest
+from django.utils import timezone
+from PIL import Image
+
+pytestmark = [pytest.mark.django_db]
+
+CHUNK_SIZE = 1000
+
+
+@pytest.fixture
+def staging(settings, tmp_path, monkeypatch):
+    from blog import models, uploads
+
+    settings.MEDIA_ROOT = str(tmp_path / 'media')
+    monkeypatch.setattr(models, 'UPLOAD_STAGING_ROOT', str(tmp_path))
+    monkeypatch.setattr(uploads, 'UPLOAD_STAGING_ROOT', str(tmp_path))
+    monkeypatch.setattr(uploads, 'UPLOAD_CHUNK_SIZE', CHUNK_SIZE)
+    return tmp_path
+
+
+@pytest.fixture
+def image_bytes():
+    content = BytesIO()
+    Image.effect_noise((200, 100), 64).convert('RGB').save(content, 'PNG')
+    return content.getvalue()
+
+
+def start(client, content, sha256=None):
+    response = client.post('/uploads/', {
+        'filename': 'photo.png',
+        'size': len(content),
+        'sha256': sha256 or hashlib.sha256(content).hexdigest(),
+    })
+    assert response.status_code == 201
+    return response.json()
+
+
+def put_chunk(client, token, content, offset):
+    return client.put(
+        f'/uploads/{token}/',
+        content[offset:offset + CHUNK_SIZE],
+        content_type='application/octet-stream',
+        HTTP_UPLOAD_OFFSET=str(offset),
+    )
+
+
+def test_chunked_upload(
+        user_client, staging, image_bytes, published_category,
+        django_capture_on_commit_callbacks
+):
+    from blog.models import ChunkedUpload, Post
+
+    token = start(user_client, image_bytes)['token']
+    assert put_chunk(user_client, token, image_bytes, 0).status_code == 200
+
+    response = put_chunk(user_client, token, image_bytes, 0)
+    assert response.status_code == 409, (
+        'Убедитесь, что повторно отправленная часть не дописывается к файлу.'
+    )
+    offset = response.json()['offset']
+    assert offset == CHUNK_SIZE
+    assert user_client.get(f'/uploads/{token}/').json()['offset'] == offset
+
+    while offset < len(image_bytes):
+        response = put_chunk(user_client, token, image_bytes, offset)
+        assert response.status_code == 200
+        offset = response.json()['offset']
+    assert response.json()['complete']
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = user_client.post('/posts/create/', {
+            'title': 'Публикация',
+            'text': 'Текст публикации',
+            'pub_date': timezone.now().strftime('%Y-%m-%dT%H:%M'),
+            'category': published_category.id,
+            'is_published': True,
+            'upload_token': token,
+        })
+    assert response.status_code == 302
+    post = Post.objects.get(title='Публикация')
+    assert post.image and post.image_size == [200, 100], (
+        'Убедитесь, что форма публикации принимает изображение, '
+        'загруженное по частям, по `upload_token`.'
+    )
+    assert not ChunkedUpload.objects.exists()
+    assert not list(staging.glob('*.part'))
+
+
+def test_chunked_upload_checksum(user_client, staging, image_bytes):
+    token = start(user_client, image_bytes, sha256='0' * 64)['token']
+    offset = 0
+    while offset + CHUNK_SIZE < len(image_bytes):
+        offset = put_chunk(
+            user_client, token, image_bytes, offset
+        ).json()['offset']
+    response = put_chunk(user_client, token, image_bytes, offset)
+    assert response.status_code == 422, (
+        'Убедитесь, что загрузка с неверной контрольной суммой не '
+        'принимается.'
+    )
+    assert response.json()['offset'] == 0
+
+
+def test_chunked_upload_is_private(
+        user_client, another_user_client, staging, image_bytes
+):
+    token = start(user_client, image_bytes)['token']
+    response = put_chunk(another_user_client, token, image_bytes, 0)
+    assert response.status_code == 404